@@ -59,6 +59,22 @@ def send_email_notification(self, recipient_email: str, subject: str, message: s
             raise self.retry(countdown=60, max_retries=3)
         return {"status": "error", "message": f"Failed to send email: {str(e)}"}
 
+@celery_app.task
+def send_job_alert_chunk(campaign_id: str, recipients: list):
+    """Send one chunk of a job-alert campaign over a single SMTP session"""
+    from job_alerts import send_campaign_chunk, record_failed_chunk
+    try:
+        return send_campaign_chunk(get_redis(), campaign_id, recipients)
+
+    except Exception as e:
+        # The chunk was never recorded: count it as failed, or the campaign
+        # would wait for it (status "sending") forever
+        try:
+            record_failed_chunk(get_redis(), campaign_id, recipients, str(e))
+        except Exception:
+            pass  # Redis itself is failing; there is nowhere to record it
+        return {"status": "error", "message": f"Failed to send campaign chunk: {str(e)}"}
+
 @celery_app.task
 def process_job_application(application_id: int):
     """Background task to process job applications"""
@@ -93,19 +109,17 @@ def generate_daily_reports():
     """Background task to generate daily analytics reports"""
     try:
         from datetime import datetime, timedelta
-        from database import get_db
+        from database import get_db_session
         from models import Job, Application
         
-        # Get database session
-        db = next(get_db())
-        
         # Generate report data
         today = datetime.utcnow().date()
         yesterday = today - timedelta(days=1)
         
         # Count new jobs and applications
-        new_jobs = db.query(Job).filter(Job.created_at >= yesterday).count()
-        new_applications = db.query(Application).filter(Application.created_at >= yesterday).count()
+        with get_db_session() as db:
+            new_jobs = db.query(Job).filter(Job.created_at >= yesterday).count()
+            new_applications = db.query(Application).filter(Application.created_at >= yesterday).count()
         
         report_data = {
             "date": str(yesterday),
@@ -151,6 +165,21 @@ def cleanup_expired_sessions():
     except Exception as e:
         return {"status": "error", "message": f"Failed to cleanup sessions: {str(e)}"}
 
+@celery_app.task
+def rollup_job_views(days: int = 2):
+    """Persist the Redis daily job-view buckets into job_view_daily"""
+    try:
+        from database import get_db_session
+        from job_views import rollup_daily_views
+
+        with get_db_session() as db:
+            upserted = rollup_daily_views(get_redis(), db, days)
+
+        return {"status": "success", "rows_upserted": upserted}
+
+    except Exception as e:
+        return {"status": "error", "message": f"Failed to roll up job views: {str(e)}"}
+
 # Periodic tasks configuration
 from celery.schedules import crontab
 
@@ -163,4 +192,8 @@ celery_app.conf.beat_schedule = {
         'task': 'background_tasks.cleanup_expired_sessions', 
         'schedule': crontab(minute=0),  # Run every hour
     },
+    'rollup-job-views': {
+        'task': 'background_tasks.rollup_job_views',
+        'schedule': crontab(minute='*/15'),  # Today and yesterday, every 15 minutes
+    },
 }
@@ -0,0 +1,124 @@
+"""Compare sync (threadpool) and async (asyncpg) database endpoints under
+concurrent load.
+
+Builds a small in-process app with the same query behind a sync endpoint
+(Session on a psycopg2 QueuePool, run on the threadpool like our `def`
+routes) and an async one (AsyncSession on asyncpg, like the `async def`
+routes). It then fires `concurrency` simultaneous requests at each through
+httpx's ASGI transport, so no server or network hop is involved.
+
+While the DB traffic runs it also times a trivial sync endpoint. That shows
+how much DB waits starve the threadpool (40 workers by default), which every
+other sync endpoint shares.
+
+Each request runs SELECT pg_sleep(latency) to stand in for a query of that
+latency. Both engines get the same pool size, so the execution models are
+compared rather than the pools.
+
+Requires a reachable PostgreSQL at DATABASE_URL.
+
+Usage: python benchmark_async_db.py [requests] [concurrency] [query_latency_ms] [pool_size]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from typing import List
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from database import DATABASE_URL, async_database_url
+
+QUERY = text("SELECT pg_sleep(:latency)")
+PING_INTERVAL = 0.01  # seconds between probe requests to the non-DB endpoint
+
+def build_app(pool_size: int, latency: float):
+    pool = dict(pool_size=pool_size, max_overflow=0, pool_timeout=120)
+    sync_engine = create_engine(DATABASE_URL, **pool)
+    async_engine = create_async_engine(async_database_url(DATABASE_URL), **pool)
+    SyncSession = sessionmaker(bind=sync_engine)
+    AsyncSessionMaker = async_sessionmaker(async_engine)
+    app = FastAPI()
+
+    def get_sync_db():
+        with SyncSession() as db:
+            yield db
+
+    async def get_async_db():
+        async with AsyncSessionMaker() as db:
+            yield db
+
+    @app.get("/sync")
+    def sync_query(db: Session = Depends(get_sync_db)):
+        db.execute(QUERY, {"latency": latency})
+        return {"ok": True}
+
+    @app.get("/async")
+    async def async_query(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(QUERY, {"latency": latency})
+        return {"ok": True}
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    return app, sync_engine, async_engine
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+async def timed_get(client: httpx.AsyncClient, path: str) -> float:
+    started = time.perf_counter()
+    response = await client.get(path)
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+async def run_load(client: httpx.AsyncClient, path: str, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    ping_latencies: List[float] = []
+    done = asyncio.Event()
+
+    async def one():
+        async with semaphore:
+            latencies.append(await timed_get(client, path))
+
+    async def probe():
+        while not done.is_set():
+            ping_latencies.append(await timed_get(client, "/ping"))
+            await asyncio.sleep(PING_INTERVAL)
+
+    prober = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await prober
+    return requests / elapsed, latencies, ping_latencies
+
+async def run(requests: int, concurrency: int, latency_ms: float, pool_size: int):
+    app, sync_engine, async_engine = build_app(pool_size, latency_ms / 1000)
+    transport = httpx.ASGITransport(app=app)
+    print(f"{requests} requests, concurrency {concurrency}, "
+          f"{latency_ms:g} ms per query, pool size {pool_size}")
+    print(f"  {'endpoint':<8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'ping p95 ms':>12}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=300) as client:
+        for path in ("/sync", "/async"):
+            # Open the pool's connections before timing
+            await asyncio.gather(*(client.get(path) for _ in range(pool_size)))
+            rate, latencies, pings = await run_load(client, path, requests, concurrency)
+            print(f"  {path:<8} {rate:>8.1f} {statistics.median(latencies) * 1000:>8.1f} "
+                  f"{percentile(latencies, 0.95) * 1000:>8.1f} {percentile(pings, 0.95) * 1000:>12.1f}")
+    sync_engine.dispose()
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    latency_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 20
+    pool_size = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+    asyncio.run(run(requests, concurrency, latency_ms, pool_size))
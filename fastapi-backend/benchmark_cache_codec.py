@@ -0,0 +1,90 @@
+"""Compare RedisCache value codecs on job payloads.
+
+For each codec (and each codec with zlib forced on) this reports the
+encoded size and the per-call encode/decode cost for one job and for a
+page of jobs, and checks that datetimes and enums come back with their
+original types.
+
+Redis itself is left out so only the serialization work is compared.
+
+Usage: python benchmark_cache_codec.py [jobs_per_page] [iterations]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+# models.py imports database.py, which builds (but does not connect) an engine
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+
+import redis_config
+from redis_config import CODECS, encode_value, decode_value
+from models import JobType, JobStatus
+
+def build_jobs(count: int) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "id": i,
+            "title": f"Security Guard {i}",
+            "company": "Dubai Security Services",
+            "location": "Dubai, UAE",
+            "type": JobType.FULL_TIME,
+            "description": "We are seeking experienced security guards for Dubai Mall. " * 8,
+            "requirements": [
+                "Minimum 2 years security experience",
+                "Valid SIRA certification",
+                "Good communication skills in English",
+            ],
+            "salary": "AED 3,500 - 4,500 per month",
+            "posted_date": now - timedelta(days=i % 30),
+            "status": JobStatus.ACTIVE,
+            "employer_id": 1,
+            "passport_required": bool(i % 2),
+            "required_documents": ["cv", "passport"],
+        }
+        for i in range(count)
+    ]
+
+def time_per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+def measure(value, codec, compress: bool, iterations: int):
+    # A threshold of 0 compresses everything; one past the size never does
+    redis_config.CACHE_COMPRESS_MIN_SIZE = 0 if compress else sys.maxsize
+    encoded = encode_value(value, codec)
+    encode = time_per_call(lambda: encode_value(value, codec), iterations)
+    decode = time_per_call(lambda: decode_value(encoded), iterations)
+    return len(encoded), encode, decode, decode_value(encoded)
+
+def round_trips(original: dict, decoded: dict) -> bool:
+    return all(
+        type(decoded[field]) is type(original[field]) and decoded[field] == original[field]
+        for field in ("posted_date", "type", "status")
+    )
+
+def run(jobs_per_page: int, iterations: int):
+    jobs = build_jobs(jobs_per_page)
+    payloads = [("1 job", jobs[0]), (f"{jobs_per_page} jobs", jobs)]
+    threshold = redis_config.CACHE_COMPRESS_MIN_SIZE
+
+    print(f"{iterations} iterations per measurement")
+    print(f"  {'codec':<14} {'payload':<10} {'bytes':>9} {'encode us':>11} {'decode us':>11}  exact types")
+    for codec in CODECS.values():
+        for compress in (False, True):
+            label = codec.name + ("+zlib" if compress else "")
+            for name, value in payloads:
+                size, encode, decode, decoded = measure(value, codec, compress, iterations)
+                first = decoded if isinstance(decoded, dict) else decoded[0]
+                exact = "yes" if round_trips(jobs[0], first) else "no"
+                print(f"  {label:<14} {name:<10} {size:>9} {encode * 1e6:>11.1f} {decode * 1e6:>11.1f}  {exact}")
+    redis_config.CACHE_COMPRESS_MIN_SIZE = threshold
+
+if __name__ == "__main__":
+    jobs_per_page = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    run(jobs_per_page, iterations)
@@ -0,0 +1,91 @@
+"""Compare the CPU cost of a job-listing cache hit before and after the
+pre-serialized response cache.
+
+Before: the cached value was a JSON list of dicts. A hit paid json.loads,
+then FastAPI validated it against response_model=List[JobSchema] and
+re-serialized it.
+After: the cached value is the final response body and a hit returns it
+in a raw Response.
+
+Redis itself is left out so only the per-hit CPU work is compared.
+
+Usage: python benchmark_job_cache.py [jobs_per_page] [iterations]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+# The routers import database.py, which builds (but does not connect) an engine
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/benchmark")
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from models import JobType, JobStatus
+from schemas import Job as JobSchema
+from routers.jobs import job_list_adapter, json_response
+
+def build_jobs(count: int) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "id": i,
+            "title": f"Security Guard {i}",
+            "company": "Dubai Security Services",
+            "location": "Dubai, UAE",
+            "type": JobType.FULL_TIME,
+            "description": "We are seeking experienced security guards for Dubai Mall. " * 8,
+            "requirements": [
+                "Minimum 2 years security experience",
+                "Valid SIRA certification",
+                "Good communication skills in English",
+            ],
+            "salary": "AED 3,500 - 4,500 per month",
+            "posted_date": now - timedelta(days=i % 30),
+            "status": JobStatus.ACTIVE,
+            "employer_id": 1,
+            "passport_required": bool(i % 2),
+            "required_documents": ["cv", "passport"],
+        }
+        for i in range(count)
+    ]
+
+async def legacy_hit(cached: str, field):
+    # What read_jobs used to do on a hit: decode, then FastAPI's response handling
+    content = json.loads(cached)
+    value = await serialize_response(field=field, response_content=content)
+    return JSONResponse(value)
+
+def raw_hit(cached: str):
+    return json_response(cached)
+
+async def run(jobs_per_page: int, iterations: int):
+    jobs = job_list_adapter.validate_python(build_jobs(jobs_per_page))
+    legacy_cached = json.dumps([job.model_dump() for job in jobs], default=str)
+    raw_cached = job_list_adapter.dump_json(jobs).decode()
+    field = create_response_field(name="Response_read_jobs", type_=List[JobSchema], mode="serialization")
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await legacy_hit(legacy_cached, field)
+    legacy = (time.perf_counter() - start) / iterations
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        raw_hit(raw_cached)
+    raw = (time.perf_counter() - start) / iterations
+
+    print(f"{jobs_per_page} jobs per page, {iterations} iterations")
+    print(f"  payload size:          {len(raw_cached):>10} bytes")
+    print(f"  dict cache hit:        {legacy * 1e6:>10.1f} us")
+    print(f"  pre-serialized hit:    {raw * 1e6:>10.1f} us")
+    print(f"  speedup:               {legacy / raw:>10.1f}x")
+
+if __name__ == "__main__":
+    jobs_per_page = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(run(jobs_per_page, iterations))
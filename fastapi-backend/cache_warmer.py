@@ -0,0 +1,267 @@
+"""
+Background cache warming for job pages.
+
+After a deploy (lifespan startup) or a job write, the warmer refills:
+
+- the first WARM_LIST_PAGES pages of the default job listing,
+- the detail pages of the WARM_TOP_JOBS most viewed jobs (job_views leaderboard),
+- the WARM_TOP_SEARCHES most frequent searches (counted in jobs:search_terms).
+
+It goes through the same cached readers as the endpoints, so it fills the
+exact keys they read and skips entries that are still fresh. Requests are
+debounced so a burst of writes triggers one pass, and a Redis lock lets only
+one worker warm at a time. A worker that finds the lock taken doesn't queue a
+pass of its own: it records when it was asked (cache_warmer:requested_at),
+and the lock holder runs one more pass if that is later than the start of
+the pass it just finished. Items run on at most WARM_CONCURRENCY threads,
+each in its own short session, and wait while the connection pool has no
+idle connection, so warming never takes the connection a live request needs.
+"""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional
+import logging
+import os
+import threading
+import time
+import uuid
+import redis
+from database import engine, get_db_session
+from redis_config import get_cache, get_redis, RedisCache, RELEASE_LOCK_SCRIPT
+from job_views import top_jobs, ALL_TIME
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TERMS_KEY = "jobs:search_terms"
+SEARCH_TERMS_MAX = 1000  # distinct terms kept; the least searched are trimmed
+SEARCH_TERM_MAX_LENGTH = 100
+WARM_LOCK_KEY = "cache_warmer:lock"
+WARM_LOCK_TTL = 120  # seconds; bounds how long a crashed worker blocks warming
+WARM_REQUESTED_KEY = "cache_warmer:requested_at"
+# Keep the latest request time
+RECORD_REQUEST_SCRIPT = """
+local previous = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[1]) > previous then redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2]) end
+return 1
+"""
+# Release the lock unless a pass was requested after `started`; returns 0
+# (lock kept) when the holder should run again
+RELEASE_UNLESS_REQUESTED_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then return -1 end
+if tonumber(redis.call('GET', KEYS[2]) or '0') > tonumber(ARGV[2]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return 0
+end
+redis.call('DEL', KEYS[1])
+return 1
+"""
+
+WARM_LIST_PAGES = int(os.getenv("WARM_LIST_PAGES", "3"))
+WARM_TOP_JOBS = int(os.getenv("WARM_TOP_JOBS", "20"))
+WARM_TOP_SEARCHES = int(os.getenv("WARM_TOP_SEARCHES", "10"))
+WARM_CONCURRENCY = int(os.getenv("WARM_CONCURRENCY", "1"))
+WARM_DEBOUNCE = float(os.getenv("WARM_DEBOUNCE", "2"))  # seconds
+POOL_BACKOFF_INTERVAL = 0.2  # seconds between checks for an idle connection
+POOL_BACKOFF_TIMEOUT = 30  # give up on an item rather than wait forever
+SEARCH_FLUSH_INTERVAL = float(os.getenv("SEARCH_FLUSH_INTERVAL", "10"))  # seconds
+
+class SearchTermBuffer:
+    """Counts searches in-process and flushes them as one pipeline (see job_views.ViewBuffer)"""
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, term: str):
+        with self._lock:
+            # Past the cap only already seen terms count; new ones are the long tail
+            if term in self._counts or len(self._counts) < SEARCH_TERMS_MAX:
+                self._counts[term] += 1
+
+    def flush(self, redis_client: redis.Redis) -> int:
+        """Write pending counts to Redis; returns how many searches were flushed"""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return 0
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for term, count in counts.items():
+                pipe.zincrby(SEARCH_TERMS_KEY, count, term)
+            pipe.execute()
+        except Exception as e:
+            # Only a ranking hint, so the counts are dropped rather than retried
+            logger.error(f"Redis search term error: {e}")
+            return 0
+        return sum(counts.values())
+
+    def start(self, get_redis_client: Callable[[], redis.Redis], interval: float = SEARCH_FLUSH_INTERVAL):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.flush(get_redis_client())
+
+        self._thread = threading.Thread(target=run, name="search-term-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, get_redis_client: Callable[[], redis.Redis]):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush(get_redis_client())
+
+search_terms = SearchTermBuffer()
+
+def record_search(query: str):
+    """Count a search so the warmer knows which ones are common"""
+    term = query.lower()
+    if len(term) <= SEARCH_TERM_MAX_LENGTH:
+        search_terms.add(term)
+
+def common_searches(redis_client: redis.Redis, limit: int):
+    """Most frequent search terms, trimming the long tail as a side effect"""
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zremrangebyrank(SEARCH_TERMS_KEY, 0, -(SEARCH_TERMS_MAX + 1))
+    pipe.zrevrange(SEARCH_TERMS_KEY, 0, limit - 1)
+    return pipe.execute()[1]
+
+def _pool_has_idle_connection() -> bool:
+    size = getattr(engine.pool, "size", None)
+    if size is None:
+        # Pools without a fixed size (e.g. NullPool) don't hold connections
+        return True
+    return engine.pool.checkedout() < size()
+
+class CacheWarmer:
+    """Debounced background refill of the hottest job cache entries"""
+    def __init__(self, debounce: float = WARM_DEBOUNCE, concurrency: int = WARM_CONCURRENCY):
+        self.debounce = debounce
+        self.concurrency = max(1, concurrency)
+        self.last_run: Optional[dict] = None
+        self._requested_at = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+
+    def request(self):
+        """Ask for a warming pass (coalesced with other requests)"""
+        self._requested_at = time.time()
+        self._wake.set()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            # Let a burst of writes settle into one pass
+            if self._stop.wait(self.debounce):
+                return
+            self._wake.clear()
+            try:
+                self.warm(get_cache(), get_redis())
+            except Exception as e:
+                logger.error(f"Cache warming error: {e}")
+
+    def warm(self, cache: RedisCache, redis_client: redis.Redis) -> Optional[dict]:
+        """Run one warming pass unless another worker is already warming"""
+        token = uuid.uuid4().hex
+        if not redis_client.set(WARM_LOCK_KEY, token, nx=True, ex=WARM_LOCK_TTL):
+            # The holder's pass may predate the write that asked for this one;
+            # leave it a note instead of queueing a pass per worker
+            redis_client.eval(
+                RECORD_REQUEST_SCRIPT, 1, WARM_REQUESTED_KEY, repr(self._requested_at), WARM_LOCK_TTL
+            )
+            if not redis_client.exists(WARM_LOCK_KEY):
+                # Released before the note landed; nobody will read it
+                self.request()
+            return None
+        try:
+            while True:
+                started_at = time.time()
+                started = time.monotonic()
+                stats = self._warm(cache, redis_client)
+                stats["seconds"] = round(time.monotonic() - started, 3)
+                stats["finished_at"] = time.time()
+                self.last_run = stats
+                released = redis_client.eval(
+                    RELEASE_UNLESS_REQUESTED_SCRIPT, 2, WARM_LOCK_KEY, WARM_REQUESTED_KEY,
+                    token, repr(started_at), WARM_LOCK_TTL
+                )
+                if released != 0 or self._stop.is_set():
+                    return stats
+        finally:
+            redis_client.eval(RELEASE_LOCK_SCRIPT, 1, WARM_LOCK_KEY, token)
+
+    def _warm(self, cache: RedisCache, redis_client: redis.Redis) -> dict:
+        # Imported here because routers.jobs asks this module for warming passes
+        from routers.jobs import cached_job_list, cached_job_detail, cached_job_search
+
+        stats = {"list_pages": 0, "jobs": 0, "searches": 0, "errors": 0}
+
+        # Listing pages follow each other's cursors, so they go one at a time
+        cursor = None
+        for _ in range(WARM_LIST_PAGES):
+            result = self._run_item(partial(cached_job_list, cache, cursor=cursor), stats)
+            if result is None:
+                break
+            stats["list_pages"] += 1
+            cursor = result[1]
+            if cursor is None:
+                break
+
+        items = [("jobs", partial(cached_job_detail, cache, job_id=job_id))
+                 for job_id, _ in top_jobs(redis_client, ALL_TIME, WARM_TOP_JOBS)]
+        items += [("searches", partial(cached_job_search, cache, query=term))
+                  for term in common_searches(redis_client, WARM_TOP_SEARCHES)]
+
+        def warm_item(item):
+            kind, fn = item
+            if self._run_item(fn, stats) is not None:
+                with self._stats_lock:
+                    stats[kind] += 1
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="cache-warmer") as executor:
+            list(executor.map(warm_item, items))
+        return stats
+
+    def _run_item(self, fn: Callable, stats: dict):
+        """Run fn(db) in its own session once the pool has an idle connection"""
+        deadline = time.monotonic() + POOL_BACKOFF_TIMEOUT
+        while not _pool_has_idle_connection():
+            if self._stop.wait(POOL_BACKOFF_INTERVAL) or time.monotonic() > deadline:
+                return None
+        if self._stop.is_set():
+            return None
+        try:
+            with get_db_session() as db:
+                return fn(db=db)
+        except Exception as e:
+            # e.g. a leaderboard entry for a job deleted since
+            with self._stats_lock:
+                stats["errors"] += 1
+            logger.warning(f"Cache warming item failed: {e}")
+            return None
+
+    def to_dict(self) -> dict:
+        return {"running": self._thread is not None, "last_run": self.last_run}
+
+cache_warmer = CacheWarmer()
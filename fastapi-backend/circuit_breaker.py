@@ -0,0 +1,104 @@
+"""
+Circuit breaker for the primary database.
+
+The instrumented pools (see pool_metrics.instrumented_pool) ask the breaker
+before every connection checkout and report the checkout's outcome. After
+DB_BREAKER_FAILURES consecutive failed checkouts the breaker opens, and
+checkouts fail at once with CircuitOpenError (answered 503) instead of each
+request tying up a worker while it waits for a connect that is going to
+fail. Requests that never check out a connection (cache hits) are not
+affected. After DB_BREAKER_RESET_TIMEOUT seconds one checkout is let
+through as a probe (half-open): if it succeeds the breaker closes,
+otherwise it opens for another period.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """A checkout refused because the breaker is open"""
+    def __init__(self, breaker: "CircuitBreaker"):
+        super().__init__(f"Circuit breaker {breaker.name} is open: {breaker.last_error}")
+        self.retry_after = breaker.retry_after()
+
+class CircuitBreaker:
+    """Thread-safe consecutive-failure breaker"""
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.rejected = 0
+        self._probe_started: Optional[float] = None
+
+    def allow(self) -> bool:
+        """Whether a connection checkout may try the database now"""
+        if self.state == CLOSED:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probe_started = None
+            if self.state == HALF_OPEN:
+                # One probe at a time; a probe that never reported back (e.g.
+                # its checkout timed out in the pool) is replaced after a reset period
+                if self._probe_started is None or now - self._probe_started >= self.reset_timeout:
+                    self._probe_started = now
+                    return True
+            self.rejected += 1
+            return False
+
+    def retry_after(self) -> int:
+        """Seconds until the next probe is let through (for Retry-After)"""
+        if self.opened_at is None:
+            return 1
+        return max(1, int(self.reset_timeout - (time.monotonic() - self.opened_at)) + 1)
+
+    def record_success(self):
+        # Hot path: nothing to do while closed and healthy
+        if self.state == CLOSED and self.failures == 0:
+            return
+        with self._lock:
+            if self.state != CLOSED:
+                logger.warning(f"Circuit breaker {self.name} closed: database reachable again")
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._probe_started = None
+
+    def record_failure(self, error: Exception):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(getattr(error, "orig", error)).strip()
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(
+                        f"Circuit breaker {self.name} open for {self.reset_timeout:g}s "
+                        f"after {self.failures} failed connects: {self.last_error}"
+                    )
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probe_started = None
+
+    def to_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout": self.reset_timeout,
+            # Requests answered 503 without trying the database
+            "rejected": self.rejected,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,182 @@
+"""
+HTTP response compression.
+
+CompressionMiddleware negotiates brotli or gzip from Accept-Encoding and
+compresses compressible responses of at least COMPRESSION_MIN_SIZE bytes,
+including streamed ones. Responses that already carry a Content-Encoding
+pass through untouched, which is how precompressed cache entries are served:
+compress_payload() gzips a body once when it is cached, and
+precompressed_response() sends those bytes as-is to every client that
+accepts gzip (decompressing only for the rare one that doesn't).
+
+Brotli is used when the `brotli` package is installed; otherwise only gzip
+is offered.
+"""
+import gzip
+import os
+import zlib
+from typing import Dict, Optional, Union
+from fastapi import Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# Quality 4-5 compresses better than gzip -6 at a similar CPU cost
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+GZIP_MAGIC = b"\x1f\x8b"
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Map each coding in an Accept-Encoding header to its q-value"""
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+def accepts_encoding(accept_encoding: Optional[str], encoding: str) -> bool:
+    accepted = _accepted_encodings(accept_encoding)
+    return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best content coding we support for a request, or None for identity"""
+    accepted = _accepted_encodings(accept_encoding)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def compress_payload(payload: Union[str, bytes]) -> bytes:
+    """Gzip a response body for caching, if it is big enough to be worth it"""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    if len(payload) < COMPRESSION_MIN_SIZE:
+        return payload
+    # mtime=0 keeps the output deterministic for identical bodies
+    return gzip.compress(payload, compresslevel=GZIP_LEVEL, mtime=0)
+
+def precompressed_response(
+    payload: Union[str, bytes],
+    accept_encoding: Optional[str],
+    media_type: str = "application/json",
+    headers: Optional[dict] = None
+) -> Response:
+    """Response for a body that may have been stored by compress_payload"""
+    if isinstance(payload, bytes) and payload.startswith(GZIP_MAGIC):
+        if accepts_encoding(accept_encoding, "gzip"):
+            response = Response(content=payload, media_type=media_type, headers=headers)
+            response.headers["Content-Encoding"] = "gzip"
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+        payload = gzip.decompress(payload)
+    return Response(content=payload, media_type=media_type, headers=headers)
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self.compress, self.finish = compressor.process, compressor.finish
+        else:
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self.compress, self.finish = compressor.compress, compressor.flush
+
+class CompressionMiddleware:
+    """Compress responses with the best coding the client accepts"""
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+            if encoding is not None:
+                await _CompressingResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+class _CompressingResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message):
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows whether to compress
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+
+            self.compressor = _Compressor(self.encoding)
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                # Streamed: the compressed length isn't known up front
+                del headers["Content-Length"]
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": self.compressor.compress(body), "more_body": True})
+                return
+            body = self.compressor.compress(body) + self.compressor.finish()
+            headers["Content-Length"] = str(len(body))
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
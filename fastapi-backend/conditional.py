@@ -0,0 +1,104 @@
+"""
+Conditional GET (ETag / Last-Modified) helpers.
+
+Validators are derived from a cache namespace's change state (its generation
+counter and last-modified stamp, see RedisCache.get_namespace_state) rather
+than from the response body, so a request can be answered with 304 Not
+Modified before any query runs or any JSON is serialized. Every write to the
+underlying table bumps the namespace, which changes the ETag of every URL
+that reads it.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple
+from fastapi import Request, Response
+from redis_config import RedisCache
+from database import REPLICA_MAX_LAG, pin_to_primary, uses_replica
+
+# Public listings may be stored by any cache but must be revalidated
+PUBLIC_REVALIDATE = "public, no-cache"
+# Admin listings may only be kept by the browser, and revalidated too
+PRIVATE_REVALIDATE = "private, no-cache"
+
+def make_etag(namespace: str, version: int, modified: int, request: Request) -> str:
+    """Weak ETag for a URL's representation at a given namespace state"""
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{request.url.path}?{query}".encode()).hexdigest()[:16]
+    return f'W/"{namespace}.{version}.{modified}.{digest}"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: the W/ prefix is ignored on both sides
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def _not_modified_since(if_modified_since: str, modified: int) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return modified <= since.timestamp()
+
+def _recently_modified(state: Optional[Tuple[int, int]]) -> bool:
+    # The stamp is in whole seconds, hence the extra second
+    return state is None or time.time() - state[1] <= REPLICA_MAX_LAG + 1
+
+def pin_recent_writes(db, cache: RedisCache, namespace: str):
+    """Read from the primary while the namespace's last write may not have reached the replicas.
+
+    Otherwise a lagging replica could put pre-write rows into the new cache
+    generation, or serve them under the new validators, where they would
+    stick until the next write.
+    """
+    if uses_replica(db) and _recently_modified(cache.get_namespace_state(namespace)):
+        pin_to_primary(db)
+
+def conditional_get(
+    request: Request,
+    cache: RedisCache,
+    namespace: str,
+    cache_control: str = PUBLIC_REVALIDATE,
+    db=None,
+    exists: Optional[Callable[[], bool]] = None
+) -> Tuple[Optional[Response], Dict[str, str]]:
+    """Check a request's validators against a namespace's change state.
+
+    Returns (304 response, headers) when the client's copy is current, else
+    (None, headers) where headers carry the ETag/Last-Modified/Cache-Control
+    to attach to the full response. If Redis is unavailable no validators are
+    issued, since a stale 304 is worse than a full response.
+
+    Pass the request's read session as `db` to pin it to the primary right
+    after a write (see pin_recent_writes).
+
+    A namespace's validators don't say whether one resource in it exists,
+    so single-resource routes pass `exists`; it is only called before
+    answering 304, and a missing resource gets the full (404) response.
+    """
+    headers = {"Cache-Control": cache_control}
+    state = cache.get_namespace_state(namespace)
+    if db is not None and uses_replica(db) and _recently_modified(state):
+        pin_to_primary(db)
+    if state is None:
+        return None, headers
+
+    version, modified = state
+    headers["ETag"] = make_etag(namespace, version, modified, request)
+    headers["Last-Modified"] = format_datetime(datetime.fromtimestamp(modified, timezone.utc), usegmt=True)
+
+    # If-None-Match takes precedence over If-Modified-Since when both are sent
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, headers["ETag"])
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = if_modified_since is not None and _not_modified_since(if_modified_since, modified)
+
+    if fresh and (exists is None or exists()):
+        return Response(status_code=304, headers=headers), headers
+    return None, headers
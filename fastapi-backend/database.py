@@ -1,32 +1,128 @@
 import os
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, scoped_session
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.orm import Session, sessionmaker, scoped_session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
 from dotenv import load_dotenv
+import asyncio
 import logging
-import time
+import random
+import uuid
 from contextlib import contextmanager
+from typing import Callable, Optional, Type
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exception_handlers import http_exception_handler
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from pool_metrics import PoolMetrics, instrument_engine, instrumented_pool, pool_status, route_db_metrics
+from read_replicas import Replica, ReplicaSet
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
 # Configure logging
 logging.basicConfig()
-logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
+# Logs every statement and every pool checkout/checkin; for debugging only,
+# as it formats and writes a line on the hottest path
+DB_DEBUG_LOGGING = _env_flag("DB_DEBUG_LOGGING", "false")
+if DB_DEBUG_LOGGING:
+    logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
+
+# Pool sizing per engine and per worker process; the defaults stay within
+# Supabase's connection limits. Size it from /db-pool-stats.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "1"))  # 0 disables client-side pooling (NullPool)
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "1"))  # extra connections allowed under load
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))  # recycle connections after this many seconds
+DB_POOL_PRE_PING = _env_flag("DB_POOL_PRE_PING", "true")  # check connections before handing them out
+# Set when DATABASE_URL points at PgBouncer in transaction pooling mode
+# (e.g. Supabase's port 6543 pooler)
+DB_PGBOUNCER = _env_flag("DB_PGBOUNCER", "false")
+
+# Connection acquisition in get_db / get_async_db: attempts per request, and
+# the cap (seconds) of the jittered exponential backoff between them
+DB_CONNECT_ATTEMPTS = int(os.getenv("DB_CONNECT_ATTEMPTS", "3"))
+DB_RETRY_BASE_DELAY = float(os.getenv("DB_RETRY_BASE_DELAY", "0.1"))
+DB_RETRY_MAX_DELAY = float(os.getenv("DB_RETRY_MAX_DELAY", "1"))
+# Consecutive failed connects that open the primary's circuit breaker, and
+# seconds it stays open before a probe request is let through
+DB_BREAKER_FAILURES = int(os.getenv("DB_BREAKER_FAILURES", "5"))
+DB_BREAKER_RESET_TIMEOUT = float(os.getenv("DB_BREAKER_RESET_TIMEOUT", "10"))
+
+sync_pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+# Shared by the sync and async engines: both connect to the same primary
+primary_breaker = CircuitBreaker("primary", DB_BREAKER_FAILURES, DB_BREAKER_RESET_TIMEOUT)
+
+def pool_settings(pool_class: Type[Pool], metrics: PoolMetrics, breaker: Optional[CircuitBreaker] = None) -> dict:
+    """create_engine() pool arguments from the DB_POOL_* settings"""
+    if DB_POOL_SIZE <= 0:
+        # A new connection per checkout; only worth it behind PgBouncer,
+        # which does the pooling instead
+        return dict(
+            poolclass=instrumented_pool(NullPool, metrics, breaker),
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+    return dict(
+        poolclass=instrumented_pool(pool_class, metrics, breaker),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+def async_connect_args() -> dict:
+    """asyncpg connect arguments.
+
+    In transaction pooling mode consecutive transactions may run on different
+    server connections, so prepared statements (which asyncpg caches per
+    connection, and which SQLAlchemy's asyncpg dialect caches on top) would
+    go missing or collide by name. Both caches are turned off and statements
+    get unique names. psycopg2 doesn't prepare statements, and session state
+    is only ever set transaction-locally (set_config(..., true)), so nothing
+    else needs to change for PgBouncer.
+    """
+    if not DB_PGBOUNCER:
+        return {}
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+    }
 
-# Create engine with optimized pool settings for Supabase
 engine = create_engine(
     DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=1,  # Keep at 1 to stay within Supabase limits
-    max_overflow=1,  # Reduced to 1 to prevent connection spikes
-    pool_timeout=30,  # Wait up to 30 seconds for a connection
-    pool_recycle=300,  # Recycle connections every 5 minutes
-    pool_pre_ping=True,  # Enable connection health checks
-    echo=False
+    echo=False,
+    **pool_settings(QueuePool, sync_pool_metrics, primary_breaker)
 )
+instrument_engine(engine, sync_pool_metrics)
+
+def async_database_url(url: str) -> URL:
+    """DATABASE_URL rewritten for the asyncpg driver"""
+    url = make_url(url)
+    query = dict(url.query)
+    # asyncpg takes ssl=<mode> where libpq takes sslmode=<mode>
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return url.set(drivername="postgresql+asyncpg", query=query)
+
+# Async engine for `async def` endpoints: a DB wait suspends the coroutine
+# instead of holding a threadpool worker
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL),
+    echo=False,
+    connect_args=async_connect_args(),
+    **pool_settings(AsyncAdaptedQueuePool, async_pool_metrics, primary_breaker)
+)
+# Pool events are only available on the sync facade of an async engine
+instrument_engine(async_engine.sync_engine, async_pool_metrics)
 
 # Create a scoped session factory
 SessionLocal = scoped_session(
@@ -37,18 +133,103 @@ SessionLocal = scoped_session(
     )
 )
 
+# expire_on_commit=False: reloading expired attributes would be implicit IO,
+# which AsyncSession can't do
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Read replicas (comma-separated URLs) for list, search and analytics reads
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "5"))  # seconds behind before reads move to the primary
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "10"))  # seconds between lag/health checks
+
+def _replica(url: str) -> Replica:
+    metrics, async_metrics = PoolMetrics(), PoolMetrics()
+    replica_engine = create_engine(url, echo=False, **pool_settings(QueuePool, metrics))
+    replica_async_engine = create_async_engine(
+        async_database_url(url),
+        echo=False,
+        connect_args=async_connect_args(),
+        **pool_settings(AsyncAdaptedQueuePool, async_metrics)
+    )
+    instrument_engine(replica_engine, metrics)
+    instrument_engine(replica_async_engine.sync_engine, async_metrics)
+    return Replica(
+        url,
+        engine=replica_engine,
+        async_engine=replica_async_engine,
+        check_engine=create_engine(url, poolclass=NullPool, connect_args={"connect_timeout": 5}),
+        metrics=metrics,
+        async_metrics=async_metrics,
+    )
+
+read_replicas = ReplicaSet(
+    [_replica(url) for url in DATABASE_REPLICA_URLS],
+    max_lag=REPLICA_MAX_LAG,
+    check_interval=REPLICA_CHECK_INTERVAL
+)
+
+class ReadSession(Session):
+    """Session for read-only requests, bound to a replica.
+
+    The replica connection is opened on the first query; if the replica
+    can't be reached it is taken out of rotation and the session reads from
+    the primary instead. pin_to_primary() sends the remaining queries to the
+    primary, and flushes always go there.
+    """
+    def __init__(self, replica: Optional[Replica] = None, replica_bind=None, primary_bind=None, **kw):
+        super().__init__(**kw)
+        self.replica = replica
+        self.replica_bind = replica_bind
+        self.primary_bind = primary_bind
+        self._replica_connected = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.replica is None or self._flushing:
+            return self.primary_bind
+        if not self._replica_connected:
+            self._replica_connected = True
+            try:
+                self.connection(bind_arguments={"bind": self.replica_bind})
+            except exc.TimeoutError:
+                # Replica pool exhausted: fine, just busy
+                self.rollback()
+                self.replica = None
+                return self.primary_bind
+            except exc.DBAPIError as e:
+                self.rollback()
+                read_replicas.mark_down(self.replica, e)
+                self.replica = None
+                return self.primary_bind
+        return self.replica_bind
+
+ReadSessionLocal = sessionmaker(class_=ReadSession, autocommit=False, autoflush=False)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    sync_session_class=ReadSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
-# Add event listeners for connection pool management
-@event.listens_for(engine, 'checkout')
-def receive_checkout(dbapi_connection, connection_record, connection_proxy):
-    """Log when a connection is checked out from the pool"""
-    logging.info('Connection checked out from pool')
+# Per-checkout log lines, only with DB_DEBUG_LOGGING (pool_metrics counts
+# checkouts and times them without any logging)
+if DB_DEBUG_LOGGING:
+    @event.listens_for(engine, 'checkout')
+    def receive_checkout(dbapi_connection, connection_record, connection_proxy):
+        """Log when a connection is checked out from the pool"""
+        logging.info('Connection checked out from pool')
 
-@event.listens_for(engine, 'checkin')
-def receive_checkin(dbapi_connection, connection_record):
-    """Log when a connection is returned to the pool"""
-    logging.info('Connection returned to pool')
+    @event.listens_for(engine, 'checkin')
+    def receive_checkin(dbapi_connection, connection_record):
+        """Log when a connection is returned to the pool"""
+        logging.info('Connection returned to pool')
 
 @contextmanager
 def get_db_session():
@@ -60,25 +241,160 @@ def get_db_session():
         db.close()
         SessionLocal.remove()
 
-def get_db():
-    """Get database session with proper cleanup and retry logic"""
-    max_retries = 3
-    retry_delay = 1  # seconds
-    
-    for attempt in range(max_retries):
+@contextmanager
+def get_unscoped_session():
+    """Session that isn't bound to the current thread.
+
+    For generators that may resume on different threads (e.g. streamed
+    responses), where the thread-local SessionLocal registry would hand the
+    same session to whatever request runs next on the original thread.
+    """
+    db = SessionLocal.session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def run_in_new_session(fn):
+    """Wrap fn(db) so it runs in a session of its own (e.g. on a background thread)"""
+    def run():
+        with get_db_session() as db:
+            return fn(db)
+    return run
+
+def database_unavailable(retry_after: int = 1) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Database temporarily unavailable",
+        headers={"Retry-After": str(retry_after)}
+    )
+
+async def circuit_open_handler(request, error: CircuitOpenError):
+    """Exception handler: 503 for a checkout refused by an open breaker"""
+    return await http_exception_handler(request, database_unavailable(error.retry_after))
+
+async def connected_session(session_factory: Callable, connect: Callable):
+    """A new session from session_factory with its connection already acquired.
+
+    `connect(db)` is awaited to check the connection out. Connect failures
+    are retried up to DB_CONNECT_ATTEMPTS times with full-jitter
+    exponential backoff; the backoff is awaited, so no worker thread sleeps
+    through it. Gives 503 once the attempts are used up, or at once when the
+    circuit breaker refuses the checkout.
+    """
+    for attempt in range(1, DB_CONNECT_ATTEMPTS + 1):
+        db = session_factory()
         try:
-            with get_db_session() as db:
-                yield db
-            break
-        except Exception as e:
-            if attempt == max_retries - 1:  # Last attempt
-                raise e
-            logging.warning(f"Database connection attempt {attempt + 1} failed, retrying in {retry_delay} seconds...")
-            time.sleep(retry_delay)
-            retry_delay *= 2  # Exponential backoff
+            await connect(db)
+            return db
+        except (exc.OperationalError, exc.InterfaceError, CircuitOpenError) as e:
+            # Nothing was checked out, so closing does no IO
+            if isinstance(db, AsyncSession):
+                await db.close()
+            else:
+                db.close()
+            if isinstance(e, CircuitOpenError):
+                raise database_unavailable(e.retry_after) from e
+            if attempt == DB_CONNECT_ATTEMPTS:
+                raise database_unavailable() from e
+            delay = random.uniform(0, min(DB_RETRY_MAX_DELAY, DB_RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+            logging.warning(f"Database connection attempt {attempt} failed, retrying in {delay:.2f} seconds...")
+            await asyncio.sleep(delay)
+
+async def get_db():
+    """Session on the primary, connected before the endpoint runs (see connected_session).
+
+    An async dependency so retries wait on the event loop; the connect and
+    the close run on the threadpool, and sync endpoints get the session on
+    their worker thread as before.
+    """
+    db = await connected_session(
+        SessionLocal.session_factory,
+        lambda db: run_in_threadpool(db.connection)
+    )
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+async def get_async_db():
+    """AsyncSession dependency for async endpoints"""
+    db = await connected_session(AsyncSessionLocal, lambda db: db.connection())
+    try:
+        yield db
+    finally:
+        await db.close()
+
+# Read dependencies: for list, search and analytics endpoints that never
+# write. Writes, and reads that must see the caller's own write (e.g. the
+# detail fetched right after a create), stay on get_db / get_async_db.
+# Replica data may be up to REPLICA_MAX_LAG seconds old; call
+# pin_to_primary() when a response must reflect a recent write (see
+# conditional.pin_recent_writes).
+
+# They connect lazily (cache hits never need a connection), so they don't
+# retry. While the primary's breaker is open, a query that reaches the
+# primary raises CircuitOpenError, which circuit_open_handler answers with
+# 503; cache hits are still served.
+
+def get_read_db():
+    """Session on a healthy read replica, or the primary if there is none"""
+    replica = read_replicas.pick()
+    if replica is None:
+        db = SessionLocal.session_factory()
+    else:
+        db = ReadSessionLocal(replica=replica, replica_bind=replica.engine, primary_bind=engine)
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    """AsyncSession on a healthy read replica, or the primary if there is none"""
+    replica = read_replicas.pick()
+    if replica is None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    async with AsyncReadSessionLocal(
+        replica=replica,
+        replica_bind=replica.async_engine.sync_engine,
+        primary_bind=async_engine.sync_engine
+    ) as db:
+        yield db
+
+def uses_replica(db) -> bool:
+    """Whether db (Session or AsyncSession) is a read session still routed to a replica"""
+    session = getattr(db, "sync_session", db)
+    return isinstance(session, ReadSession) and session.replica is not None
+
+def pin_to_primary(db):
+    """Send a read session's remaining queries to the primary (no-op on primary sessions)"""
+    if uses_replica(db):
+        getattr(db, "sync_session", db).replica = None
 
 # Cleanup function to be called during application shutdown
 def cleanup():
     """Cleanup database connections"""
     SessionLocal.remove()
-    engine.dispose() 
\ No newline at end of file
+    engine.dispose()
+    for replica in read_replicas.replicas:
+        replica.engine.dispose()
+
+def db_pool_stats() -> dict:
+    """Live state and checkout metrics of every engine's pool, plus per-route use"""
+    return {
+        "pgbouncer": DB_PGBOUNCER,
+        "primary_breaker": primary_breaker.to_dict(),
+        "sync": {**pool_status(engine.pool), **sync_pool_metrics.to_dict()},
+        "async": {**pool_status(async_engine.pool), **async_pool_metrics.to_dict()},
+        "read_replicas": read_replicas.to_dict(),
+        # Connection use per request, by route
+        "routes": route_db_metrics.to_dict(),
+    }
+
+async def cleanup_async():
+    """Close the async engines' pooled connections"""
+    await async_engine.dispose()
+    for replica in read_replicas.replicas:
+        await replica.async_engine.dispose() 
\ No newline at end of file
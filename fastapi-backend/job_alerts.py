@@ -0,0 +1,313 @@
+"""
+Job-alert email campaigns.
+
+A campaign sends one job's alert to an explicit recipient list or to a
+segment (see SEGMENTS). Recipients are split into chunks of
+CAMPAIGN_CHUNK_SIZE and each chunk becomes one Celery task. A task sends its
+whole chunk over a single SMTP session, so the connection, STARTTLS and login
+happen once per chunk rather than once per email.
+
+Per-campaign counters live in the Redis hash campaign:{id}. Chunks update it
+once each when they finish; a chunk task that fails outright counts its whole
+chunk as failed, so the campaign still finishes. The most recent failures
+(recipient and error) are kept in the list campaign:{id}:failures.
+
+For local testing, point SMTP_SERVER/SMTP_PORT at smtp_sink.py and set
+SMTP_STARTTLS=false.
+"""
+import os
+import smtplib
+import time
+import uuid
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, Iterable, Iterator, List, Optional
+import redis
+from sqlalchemy import distinct
+from sqlalchemy.orm import Session
+from models import Job, JobApplication, ContactInquiry
+
+CAMPAIGN_CHUNK_SIZE = int(os.getenv("CAMPAIGN_CHUNK_SIZE", "100"))
+CAMPAIGN_STATS_TTL = 7 * 86400  # seconds
+CAMPAIGN_MAX_REPORTED_FAILURES = 1000  # failed counts every failure regardless
+SMTP_TIMEOUT = 30  # seconds
+
+# Segment name -> the column whose distinct values are the recipients
+SEGMENTS = {
+    "applicants": JobApplication.email,
+    "contacts": ContactInquiry.email,
+}
+
+def smtp_settings() -> Dict:
+    return {
+        "server": os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+        "port": int(os.getenv("SMTP_PORT", "587")),
+        "sender": os.getenv("SENDER_EMAIL"),
+        "password": os.getenv("SENDER_PASSWORD"),
+        # Local stand-ins (smtp_sink.py) speak plain SMTP only
+        "starttls": os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes"),
+    }
+
+def job_alert_content(job: Job):
+    """Subject and plain-text body of a job alert"""
+    subject = f"New Job Opportunity: {job.title}"
+    message = f"""
+    Dear Candidate,
+
+    We have a new job opportunity that might interest you:
+
+    Title: {job.title}
+    Location: {job.location}
+    Company: {job.company}
+
+    Description: {job.description}
+
+    Best regards,
+    Skyways Global Recruitment Team
+    """
+    return subject, message
+
+class SmtpSession:
+    """One SMTP connection (with STARTTLS and login) reused for many messages"""
+    def __init__(self, settings: Optional[Dict] = None):
+        self.settings = settings or smtp_settings()
+        self.server: Optional[smtplib.SMTP] = None
+        self.connections = 0
+
+    def connect(self):
+        self.close()
+        settings = self.settings
+        server = smtplib.SMTP(settings["server"], settings["port"], timeout=SMTP_TIMEOUT)
+        try:
+            if settings["starttls"]:
+                server.starttls()
+            if settings["password"]:
+                server.login(settings["sender"], settings["password"])
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+        self.connections += 1
+
+    def send(self, recipient: str, message: str):
+        """Send one message, reconnecting once if the server dropped the session"""
+        if self.server is None:
+            self.connect()
+        try:
+            self.server.sendmail(self.settings["sender"], [recipient], message)
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException) as e:
+            # 421 / a dropped connection: e.g. the server's per-connection
+            # message limit or idle timeout
+            if getattr(e, "smtp_code", 421) != 421:
+                raise
+            self.connect()
+            self.server.sendmail(self.settings["sender"], [recipient], message)
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except (smtplib.SMTPException, OSError):
+                self.server.close()
+            self.server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _smtp_error(error: Exception) -> str:
+    """Short "code message" form of an SMTP failure"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        code, message = next(iter(error.recipients.values()))
+    elif isinstance(error, smtplib.SMTPResponseException):
+        code, message = error.smtp_code, error.smtp_error
+    else:
+        return str(error)
+    if isinstance(message, bytes):
+        message = message.decode(errors="replace")
+    return f"{code} {message}"
+
+def _campaign_key(campaign_id: str) -> str:
+    return f"campaign:{campaign_id}"
+
+def iter_segment(db: Session, segment: str, batch_size: int = 1000) -> Iterator[str]:
+    """Distinct recipient emails of a segment, streamed from the database"""
+    column = SEGMENTS[segment]
+    query = db.query(distinct(column)).filter(column.isnot(None)).order_by(column)
+    for (email,) in query.yield_per(batch_size):
+        yield email
+
+def iter_chunks(recipients: Iterable[str], size: int = CAMPAIGN_CHUNK_SIZE) -> Iterator[List[str]]:
+    chunk = []
+    for recipient in recipients:
+        chunk.append(recipient)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def start_campaign(
+    redis_client: redis.Redis,
+    job: Job,
+    recipients: Iterable[str],
+    send_chunk
+) -> str:
+    """Register a campaign and queue one send_chunk task per chunk of recipients.
+
+    `send_chunk` is the Celery task (passed in to keep this module free of the
+    Celery app); it is called as send_chunk.delay(campaign_id, recipients).
+    """
+    campaign_id = uuid.uuid4().hex
+    key = _campaign_key(campaign_id)
+    subject, message = job_alert_content(job)
+    redis_client.hset(key, mapping={
+        "job_id": job.id,
+        "subject": subject,
+        "message": message,
+        "status": "queued",
+        "queueing": 1,
+        "total": 0,
+        "chunks": 0,
+        "chunks_done": 0,
+        "sent": 0,
+        "failed": 0,
+        "connections": 0,
+        "created_at": time.time(),
+    })
+    redis_client.expire(key, CAMPAIGN_STATS_TTL)
+
+    total = chunks = 0
+    for chunk in iter_chunks(recipients):
+        total += len(chunk)
+        chunks += 1
+        # Counted before queueing so a fast chunk never sees chunks_done > chunks
+        redis_client.hset(key, mapping={"total": total, "chunks": chunks})
+        send_chunk.delay(campaign_id, chunk)
+
+    # Chunks only finish the campaign once queueing is over; if they all
+    # finished first (or there were none), finish it here
+    pipe = redis_client.pipeline()
+    pipe.hset(key, "queueing", 0)
+    pipe.hget(key, "chunks_done")
+    _, chunks_done = pipe.execute()
+    if int(chunks_done) >= chunks:
+        _finish_campaign(redis_client, key)
+    return campaign_id
+
+def _finish_campaign(redis_client: redis.Redis, key: str):
+    redis_client.hset(key, mapping={"status": "finished", "finished_at": time.time()})
+
+def send_campaign_chunk(redis_client: redis.Redis, campaign_id: str, recipients: List[str]) -> Dict:
+    """Send one chunk of a campaign over a single SMTP session and record the outcome"""
+    key = _campaign_key(campaign_id)
+    subject, body = redis_client.hmget(key, "subject", "message")
+    if subject is None:
+        return {"status": "error", "message": "Campaign not found or expired"}
+    settings = smtp_settings()
+
+    started = time.time()
+    redis_client.hsetnx(key, "started_at", started)
+    redis_client.hset(key, "status", "sending")
+
+    sent = 0
+    failures = []
+    if not settings["sender"]:
+        # Still recorded, so the campaign finishes and shows why
+        failures = [f"{recipient}: Email credentials not configured" for recipient in recipients]
+        recipients = []
+    session = SmtpSession(settings)
+    with session:
+        for index, recipient in enumerate(recipients):
+            try:
+                msg = MIMEMultipart()
+                msg["From"] = settings["sender"]
+                msg["To"] = recipient
+                msg["Subject"] = subject
+                msg.attach(MIMEText(body, "plain"))
+                session.send(recipient, msg.as_string())
+                sent += 1
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+                # Rejected message; the session is still usable
+                failures.append(f"{recipient}: {_smtp_error(e)}")
+            except (smtplib.SMTPException, OSError) as e:
+                # Connection or login failure: the rest of the chunk can't go out
+                failures.extend(f"{r}: {_smtp_error(e)}" for r in recipients[index:])
+                break
+            except Exception as e:
+                # Anything else (e.g. building the message) would end the task
+                # without recording the chunk; fail the rest of it instead
+                failures.extend(f"{r}: {e}" for r in recipients[index:])
+                break
+
+    _record_chunk(redis_client, key, sent, failures, session.connections, time.time() - started)
+    return {"status": "success", "sent": sent, "failed": len(failures)}
+
+def record_failed_chunk(redis_client: redis.Redis, campaign_id: str, recipients: List[str], error: str):
+    """Count a whole chunk as failed, for a chunk task that died before recording it"""
+    failures = [f"{recipient}: {error}" for recipient in recipients]
+    _record_chunk(redis_client, _campaign_key(campaign_id), 0, failures, 0, 0.0)
+
+def _record_chunk(
+    redis_client: redis.Redis,
+    key: str,
+    sent: int,
+    failures: List[str],
+    connections: int,
+    seconds: float
+):
+    """Add a finished chunk to the campaign's counters, finishing the campaign after its last chunk"""
+    pipe = redis_client.pipeline()
+    pipe.hincrby(key, "sent", sent)
+    pipe.hincrby(key, "failed", len(failures))
+    pipe.hincrby(key, "connections", connections)
+    pipe.hincrbyfloat(key, "send_seconds", seconds)
+    pipe.hincrby(key, "chunks_done", 1)
+    pipe.hmget(key, "chunks", "queueing")
+    if failures:
+        failures_key = f"{key}:failures"
+        pipe.rpush(failures_key, *failures)
+        pipe.ltrim(failures_key, -CAMPAIGN_MAX_REPORTED_FAILURES, -1)
+        pipe.expire(failures_key, CAMPAIGN_STATS_TTL)
+    results = pipe.execute()
+    chunks_done, (chunks, queueing) = results[4], results[5]
+    if queueing == "0" and chunks_done >= int(chunks):
+        _finish_campaign(redis_client, key)
+
+def campaign_stats(redis_client: redis.Redis, campaign_id: str, failure_limit: int = 100) -> Optional[Dict]:
+    """Progress, throughput and recent failures of a campaign, or None if unknown"""
+    key = _campaign_key(campaign_id)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hgetall(key)
+    pipe.lrange(f"{key}:failures", -failure_limit, -1)
+    data, failures = pipe.execute()
+    if not data:
+        return None
+
+    started_at = float(data["started_at"]) if "started_at" in data else None
+    finished_at = float(data["finished_at"]) if "finished_at" in data else None
+    sent = int(data["sent"])
+    elapsed = None
+    if started_at is not None:
+        elapsed = (finished_at or time.time()) - started_at
+    return {
+        "campaign_id": campaign_id,
+        "job_id": int(data["job_id"]),
+        "status": data["status"],
+        "total": int(data["total"]),
+        "sent": sent,
+        "failed": int(data["failed"]),
+        "chunks": int(data["chunks"]),
+        "chunks_done": int(data["chunks_done"]),
+        "smtp_connections": int(data["connections"]),
+        "created_at": float(data["created_at"]),
+        "started_at": started_at,
+        "finished_at": finished_at,
+        # Wall-clock rate from the first chunk starting to the last finishing
+        "emails_per_second": round(sent / elapsed, 2) if elapsed else None,
+        # Time spent inside chunk tasks, summed over chunks
+        "send_seconds": round(float(data.get("send_seconds", 0)), 3),
+        "recent_failures": failures,
+    }
@@ -0,0 +1,82 @@
+"""
+Precomputed facet counts for job listings.
+
+Counts live in a single Redis hash whose fields are "<facet>:<value>"
+(e.g. "type:Full-time"). The hash is built once with GROUP BY queries and
+then kept current by the job write endpoints, which apply +1/-1 deltas for
+the facet values a job gains or loses. The hash also carries a TTL, so any
+drift (e.g. a write that races a rebuild) heals at the next rebuild.
+"""
+from collections import Counter
+from typing import Dict, Iterable, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import pin_to_primary
+from models import Job
+from redis_config import RedisCache
+
+JOB_FACETS_KEY = "jobs:facets"
+JOB_FACETS_TTL = 3600  # seconds
+FACET_FIELDS = ("type", "status", "location", "passport_required")
+
+def _facet_value(value) -> str:
+    if value is None:
+        return "none"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return getattr(value, "value", value)
+
+def job_facet_members(job) -> Optional[list]:
+    """Facet hash fields a job contributes to, or None for no job"""
+    if job is None:
+        return None
+    members = []
+    for field in FACET_FIELDS:
+        value = getattr(job, field)
+        if field == "passport_required":
+            value = bool(value)
+        members.append(f"{field}:{_facet_value(value)}")
+    return members
+
+def update_job_facets(cache: RedisCache, before: Optional[list], after: Optional[list]):
+    """Apply the counter deltas for a job moving between facet values"""
+    deltas = Counter(after or [])
+    deltas.subtract(before or [])
+    cache.increment_counters(JOB_FACETS_KEY, dict(deltas))
+
+def reset_job_facets(cache: RedisCache):
+    """Drop the counts so the next read rebuilds them (e.g. after a bulk import)"""
+    cache.delete(JOB_FACETS_KEY)
+
+def _build_counters(db: Session) -> Dict[str, int]:
+    counters = {}
+    for field in FACET_FIELDS:
+        column = getattr(Job, field)
+        if field == "passport_required":
+            column = func.coalesce(column, False)
+        for value, count in db.query(column, func.count(Job.id)).group_by(column).all():
+            counters[f"{field}:{_facet_value(value)}"] = count
+    return counters
+
+def _nest(counters: Dict[str, int]) -> Dict[str, Dict[str, int]]:
+    facets = {field: {} for field in FACET_FIELDS}
+    for member, count in counters.items():
+        field, _, value = member.partition(":")
+        if count > 0 and field in facets:
+            facets[field][value] = count
+    return facets
+
+def get_job_facets(db: Session, cache: RedisCache) -> Dict[str, Dict[str, int]]:
+    """Facet counts keyed by facet then value, rebuilding the hash if missing"""
+    counters = cache.get_counters(JOB_FACETS_KEY)
+    if counters is None:
+        # Deltas land on top of the rebuilt counts, so they must include
+        # every committed write: a lagging replica would lose some for the TTL
+        pin_to_primary(db)
+        counters = _build_counters(db)
+        cache.replace_counters(JOB_FACETS_KEY, counters, expire=JOB_FACETS_TTL)
+    return _nest(counters)
+
+def facet_summary(values: Iterable) -> str:
+    """Stable, cache-key friendly rendering of the active filter values"""
+    return ",".join("" if value is None else str(_facet_value(value)) for value in values)
@@ -0,0 +1,199 @@
+"""
+Bulk job import from CSV or NDJSON streams.
+
+Rows are parsed lazily from the request body, validated against
+schemas.JobCreate and written in batches of IMPORT_BATCH_SIZE, each with one
+multi-row INSERT and one commit, so memory use and transaction length stay
+bounded however large the upload is. Invalid rows are skipped and reported
+by row number (1-based, not counting a CSV header); the caller invalidates
+caches once for the whole import.
+
+CSV columns are JobCreate's field names. List fields (requirements,
+required_documents) hold either a JSON array or values separated by "|";
+empty cells fall back to the field's default.
+"""
+import codecs
+import csv
+import json
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from models import Job, User
+from schemas import JobCreate
+
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000  # the response still counts every failed row
+LIST_FIELDS = ("requirements", "required_documents")
+LIST_SEPARATOR = "|"
+REQUIRED_CSV_COLUMNS = {
+    name for name, field in JobCreate.model_fields.items() if field.is_required()
+}
+
+CONTENT_TYPE_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+def import_format(content_type: Optional[str]) -> Optional[str]:
+    """Import format implied by a Content-Type header, if any"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return CONTENT_TYPE_FORMATS.get(media_type)
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Decode a byte stream into lines, keeping line endings (csv needs them)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    for chunk in chunks:
+        # The last piece may be a partial line; keep it for the next chunk
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+def _csv_value(field: str, value: str):
+    if field in LIST_FIELDS:
+        if value.startswith("["):
+            return json.loads(value)
+        return [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+    return value
+
+def iter_csv_records(lines: Iterator[str]) -> Iterator[Tuple[int, object]]:
+    """(row number, dict or parse error) for each CSV record"""
+    reader = csv.reader(lines)
+    header = [name.strip() for name in next(reader, [])]
+    missing = REQUIRED_CSV_COLUMNS - set(header)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"CSV header is missing required columns: {', '.join(sorted(missing))}"
+        )
+    for row_number, values in enumerate(reader, start=1):
+        if not any(value.strip() for value in values):
+            continue
+        if len(values) != len(header):
+            yield row_number, ValueError(f"expected {len(header)} columns, got {len(values)}")
+            continue
+        try:
+            yield row_number, {
+                field: _csv_value(field, value.strip())
+                for field, value in zip(header, values)
+                if value.strip()
+            }
+        except ValueError as e:
+            yield row_number, e
+
+def iter_ndjson_records(lines: Iterator[str]) -> Iterator[Tuple[int, object]]:
+    """(row number, dict or parse error) for each non-blank NDJSON line"""
+    for row_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_number, e
+            continue
+        if not isinstance(record, dict):
+            yield row_number, ValueError("each line must be a JSON object")
+            continue
+        yield row_number, record
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    ]
+
+class _ImportReport:
+    def __init__(self):
+        self.total_rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def fail(self, row: int, messages: List[str]):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": messages})
+
+    def to_dict(self) -> dict:
+        return {
+            "total_rows": self.total_rows,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+def _insert_batch(
+    db: Session,
+    batch: List[Tuple[int, JobCreate]],
+    report: _ImportReport,
+    on_imported: Optional[Callable[[List[int]], None]] = None
+):
+    employer_ids = {job.employer_id for _, job in batch}
+    known_employers = {
+        row.id for row in db.query(User.id).filter(User.id.in_(employer_ids)).all()
+    }
+    rows = []
+    for row_number, job in batch:
+        if job.employer_id not in known_employers:
+            report.fail(row_number, [f"employer_id: no user with id {job.employer_id}"])
+            continue
+        rows.append(job.dict())
+    if not rows:
+        return
+
+    try:
+        # executemany on insert() is sent as multi-row INSERT ... VALUES statements
+        job_ids = db.scalars(insert(Job).returning(Job.id), rows).all()
+        db.commit()
+        report.imported += len(rows)
+    except Exception as e:
+        db.rollback()
+        message = str(getattr(e, "orig", e)).strip()
+        for row_number, job in batch:
+            if job.employer_id in known_employers:
+                report.fail(row_number, [f"database: {message}"])
+        return
+    if on_imported is not None:
+        on_imported(job_ids)
+
+def import_jobs(
+    db: Session,
+    chunks: Iterable[bytes],
+    fmt: str,
+    on_imported: Optional[Callable[[List[int]], None]] = None
+) -> dict:
+    """Validate and insert jobs from a CSV/NDJSON byte stream; returns the import report
+
+    on_imported, if given, is called with the new job ids after each batch commits.
+    """
+    lines = iter_lines(chunks)
+    records = iter_csv_records(lines) if fmt == "csv" else iter_ndjson_records(lines)
+    report = _ImportReport()
+    batch: List[Tuple[int, JobCreate]] = []
+
+    for row_number, record in records:
+        report.total_rows += 1
+        if isinstance(record, Exception):
+            report.fail(row_number, [f"parse: {record}"])
+            continue
+        try:
+            batch.append((row_number, JobCreate.model_validate(record)))
+        except ValidationError as e:
+            report.fail(row_number, _validation_messages(e))
+            continue
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            _insert_batch(db, batch, report, on_imported)
+            batch = []
+
+    if batch:
+        _insert_batch(db, batch, report, on_imported)
+    return report.to_dict()
@@ -0,0 +1,382 @@
+"""
+Job view counters kept in Redis sorted sets.
+
+- job_views:leaderboard          all-time views per job (member = job id)
+- job_views:hour:<YYYYMMDDHH>    views per job within one UTC hour
+- job_views:day:<YYYYMMDD>       views per job within one UTC day
+
+Rolling windows are answered by unioning the buckets that cover them
+(24 hourly buckets for 24h, daily buckets for 7d/30d). The union is stored
+under a short-lived key, so concurrent readers share one ZUNIONSTORE.
+
+Page views are not written to Redis one by one: each worker buffers them in
+a ViewBuffer and flushes all pending increments and HyperLogLog visitor adds
+(job_views:unique:<id>) as one pipeline every VIEW_FLUSH_INTERVAL seconds.
+
+Redis is not the system of record: rollup_daily_views copies the daily
+buckets (and per-day visitor HLLs) into the job_view_daily table.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Set, Tuple
+import logging
+import os
+import threading
+import time
+import uuid
+import redis
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from models import Job, JobViewDaily
+from redis_config import RELEASE_LOCK_SCRIPT
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_KEY = "job_views:leaderboard"
+HOUR_BUCKET_PREFIX = "job_views:hour:"
+DAY_BUCKET_PREFIX = "job_views:day:"
+WINDOW_KEY_PREFIX = "job_views:window:"
+UNIQUE_VISITORS_PREFIX = "job_views:unique:"
+DAILY_UNIQUE_VISITORS_PREFIX = "job_views:unique_day:"
+KNOWN_JOB_IDS_KEY = "jobs:known_ids"
+KNOWN_JOB_IDS_VERSION_KEY = "jobs:known_ids:version"
+KNOWN_JOB_IDS_LOCK_KEY = "jobs:known_ids:lock"
+
+HOUR_BUCKET_TTL = 86400 + 3600  # a full day plus the bucket being written
+DAY_BUCKET_TTL = 86400 * 31
+WINDOW_TTL = 60  # seconds a computed window union is reused
+DAILY_UNIQUE_VISITORS_TTL = 86400 * 3  # long enough for the rollup to catch up
+KNOWN_JOB_IDS_TTL = 600
+KNOWN_JOB_IDS_LOCK_TTL = 30  # seconds; bounds a rebuild's database read
+VIEW_FLUSH_INTERVAL = float(os.getenv("VIEW_FLUSH_INTERVAL", "2"))
+
+# window name -> (bucket prefix, bucket format, bucket step, bucket count)
+WINDOWS = {
+    "24h": (HOUR_BUCKET_PREFIX, "%Y%m%d%H", timedelta(hours=1), 24),
+    "7d": (DAY_BUCKET_PREFIX, "%Y%m%d", timedelta(days=1), 7),
+    "30d": (DAY_BUCKET_PREFIX, "%Y%m%d", timedelta(days=1), 30),
+}
+ALL_TIME = "all"
+
+# Apply a job write to the id set, if there is one (a partial set would pass
+# for the full one), and bump the version so a rebuild in flight is dropped
+UPDATE_KNOWN_IDS_SCRIPT = """
+redis.call('INCR', KEYS[2])
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call(ARGV[1], KEYS[1], unpack(ARGV, 2))
+end
+return 1
+"""
+# Move a rebuilt id set into place unless a job write happened since its
+# version was read
+PUBLISH_KNOWN_IDS_SCRIPT = """
+if (redis.call('GET', KEYS[3]) or '0') ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+redis.call('RENAME', KEYS[1], KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return 1
+"""
+
+def hour_bucket_key(at: datetime) -> str:
+    return f"{HOUR_BUCKET_PREFIX}{at:%Y%m%d%H}"
+
+def day_bucket_key(at: datetime) -> str:
+    return f"{DAY_BUCKET_PREFIX}{at:%Y%m%d}"
+
+def daily_unique_key(at, job_id: int) -> str:
+    return f"{DAILY_UNIQUE_VISITORS_PREFIX}{at:%Y%m%d}:{job_id}"
+
+def record_views(pipe, job_id: int, count: int = 1, at: Optional[datetime] = None):
+    """Queue the leaderboard and bucket increments for a job on a pipeline"""
+    at = at or datetime.utcnow()
+    pipe.zincrby(LEADERBOARD_KEY, count, job_id)
+    pipe.zincrby(hour_bucket_key(at), count, job_id)
+    pipe.expire(hour_bucket_key(at), HOUR_BUCKET_TTL)
+    pipe.zincrby(day_bucket_key(at), count, job_id)
+    pipe.expire(day_bucket_key(at), DAY_BUCKET_TTL)
+
+def _window_key(redis_client: redis.Redis, window: str) -> str:
+    if window == ALL_TIME:
+        return LEADERBOARD_KEY
+    prefix, fmt, step, count = WINDOWS[window]
+    now = datetime.utcnow()
+    bucket_keys = [f"{prefix}{now - step * i:{fmt}}" for i in range(count)]
+    window_key = f"{WINDOW_KEY_PREFIX}{window}"
+    if not redis_client.exists(window_key):
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.zunionstore(window_key, bucket_keys)
+        pipe.expire(window_key, WINDOW_TTL)
+        pipe.execute()
+    return window_key
+
+def top_jobs(redis_client: redis.Redis, window: str = ALL_TIME, limit: int = 10) -> List[Tuple[int, int]]:
+    """(job_id, views) pairs for the most viewed jobs in a window"""
+    ranked = redis_client.zrevrange(_window_key(redis_client, window), 0, limit - 1, withscores=True)
+    return [(int(job_id), int(views)) for job_id, views in ranked]
+
+def flushed_views(redis_client: redis.Redis, job_id: int) -> int:
+    """All-time views of a job that have reached Redis"""
+    try:
+        return int(redis_client.zscore(LEADERBOARD_KEY, job_id) or 0)
+    except Exception as e:
+        logger.error(f"Redis view count error: {e}")
+        return 0
+
+def view_totals(redis_client: redis.Redis, job_id: int) -> Tuple[int, int]:
+    """(total views, approximate unique visitors) for a job"""
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zscore(LEADERBOARD_KEY, job_id)
+    pipe.pfcount(f"{UNIQUE_VISITORS_PREFIX}{job_id}")
+    views, unique_visitors = pipe.execute()
+    return int(views or 0), int(unique_visitors or 0)
+
+def forget_job_views(redis_client: redis.Redis, job_id: int):
+    """Remove a deleted job from the leaderboard, every live bucket and the
+    cached window unions, so top-N lookups don't return its id"""
+    now = datetime.utcnow()
+    keys = [LEADERBOARD_KEY]
+    keys += [hour_bucket_key(now - timedelta(hours=i)) for i in range(HOUR_BUCKET_TTL // 3600 + 1)]
+    keys += [day_bucket_key(now - timedelta(days=i)) for i in range(DAY_BUCKET_TTL // 86400 + 1)]
+    keys += [f"{WINDOW_KEY_PREFIX}{window}" for window in WINDOWS]
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.zrem(key, job_id)
+        pipe.delete(f"{UNIQUE_VISITORS_PREFIX}{job_id}")
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Redis job views cleanup error: {e}")
+
+def rollup_daily_views(redis_client: redis.Redis, db: Session, days: int = 2) -> int:
+    """Upsert the last `days` daily buckets into job_view_daily.
+
+    Buckets are snapshots of a day's running total, so re-running the rollup
+    is idempotent. GREATEST keeps a persisted total from being lowered if
+    Redis lost a bucket (restart/eviction) partway through a day.
+    Returns the number of rows upserted.
+    """
+    today = datetime.utcnow().date()
+    rows = []
+    for offset in range(days):
+        view_date = today - timedelta(days=offset)
+        counts = redis_client.zrange(day_bucket_key(view_date), 0, -1, withscores=True)
+        if not counts:
+            continue
+        pipe = redis_client.pipeline(transaction=False)
+        for job_id, _ in counts:
+            pipe.pfcount(daily_unique_key(view_date, int(job_id)))
+        unique_counts = pipe.execute()
+        rows.extend(
+            {"job_id": int(job_id), "view_date": view_date, "views": int(views), "unique_visitors": int(unique)}
+            for (job_id, views), unique in zip(counts, unique_counts)
+        )
+    if not rows:
+        return 0
+
+    # Buckets may still hold views for jobs deleted since
+    existing_ids = {
+        row.id for row in db.query(Job.id).filter(Job.id.in_({row["job_id"] for row in rows})).all()
+    }
+    rows = [row for row in rows if row["job_id"] in existing_ids]
+    if not rows:
+        return 0
+
+    stmt = insert(JobViewDaily).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[JobViewDaily.job_id, JobViewDaily.view_date],
+        set_={
+            "views": func.greatest(JobViewDaily.views, stmt.excluded.views),
+            "unique_visitors": func.greatest(JobViewDaily.unique_visitors, stmt.excluded.unique_visitors),
+            "updated_at": func.now()
+        }
+    )
+    db.execute(stmt)
+    db.commit()
+    return len(rows)
+
+class KnownJobIds:
+    """Per-worker copy of the set of existing job ids.
+
+    Lets view tracking reject unknown ids without a database lookup. The
+    shared copy is a Redis set that job creates, imports and deletes update
+    in place (add_known_job_ids / remove_known_job_ids). An id missing from
+    the worker's copy is looked up in the shared set, so a new job is
+    accepted by every worker as soon as it is created. The shared set is
+    rebuilt from Postgres only when it is missing, by one worker at a time;
+    the rebuild is dropped if a job write landed while it was reading, since
+    its id list may predate that write.
+    """
+    def __init__(self, ttl: float = 60, miss_reload_interval: float = 5):
+        self.ttl = ttl
+        self.miss_reload_interval = miss_reload_interval
+        self._ids: Set[int] = set()
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def contains(self, redis_client: redis.Redis, load_from_db: Callable[[], List[int]], job_id: int) -> bool:
+        if time.monotonic() - self._loaded_at >= self.ttl:
+            self._reload(redis_client, load_from_db)
+        if job_id in self._ids:
+            return True
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.exists(KNOWN_JOB_IDS_KEY)
+        pipe.sismember(KNOWN_JOB_IDS_KEY, job_id)
+        exists, is_member = pipe.execute()
+        if exists:
+            if is_member:
+                self._ids.add(job_id)
+            return bool(is_member)
+        # No shared set to ask; rebuilding it is throttled per worker
+        if time.monotonic() - self._loaded_at >= self.miss_reload_interval:
+            self._reload(redis_client, load_from_db)
+        return job_id in self._ids
+
+    def add(self, job_id: int):
+        self._ids.add(job_id)
+
+    def discard(self, job_id: int):
+        self._ids.discard(job_id)
+
+    def _reload(self, redis_client: redis.Redis, load_from_db: Callable[[], List[int]]):
+        with self._lock:
+            members = redis_client.smembers(KNOWN_JOB_IDS_KEY)
+            if members:
+                ids = {int(member) for member in members}
+            else:
+                ids = self._rebuild(redis_client, load_from_db)
+            self._ids = ids
+            self._loaded_at = time.monotonic()
+
+    @staticmethod
+    def _rebuild(redis_client: redis.Redis, load_from_db: Callable[[], List[int]]) -> Set[int]:
+        token = uuid.uuid4().hex
+        if not redis_client.set(KNOWN_JOB_IDS_LOCK_KEY, token, nx=True, ex=KNOWN_JOB_IDS_LOCK_TTL):
+            # Another worker is publishing; use a private copy until it has
+            return set(load_from_db())
+        try:
+            version = redis_client.get(KNOWN_JOB_IDS_VERSION_KEY) or b"0"
+            ids = set(load_from_db())
+            if ids:
+                # Built under a scratch key, then renamed into place
+                staging_key = f"{KNOWN_JOB_IDS_KEY}:rebuild:{token}"
+                pipe = redis_client.pipeline(transaction=False)
+                pipe.sadd(staging_key, *ids)
+                pipe.expire(staging_key, KNOWN_JOB_IDS_LOCK_TTL)
+                pipe.execute()
+                redis_client.eval(
+                    PUBLISH_KNOWN_IDS_SCRIPT, 3, staging_key, KNOWN_JOB_IDS_KEY, KNOWN_JOB_IDS_VERSION_KEY,
+                    version, KNOWN_JOB_IDS_TTL
+                )
+            return ids
+        finally:
+            redis_client.eval(RELEASE_LOCK_SCRIPT, 1, KNOWN_JOB_IDS_LOCK_KEY, token)
+
+def _update_known_job_ids(redis_client: redis.Redis, command: str, job_ids: List[int]):
+    try:
+        redis_client.eval(
+            UPDATE_KNOWN_IDS_SCRIPT, 2, KNOWN_JOB_IDS_KEY, KNOWN_JOB_IDS_VERSION_KEY, command, *job_ids
+        )
+    except Exception as e:
+        logger.error(f"Redis known job ids error: {e}")
+
+def add_known_job_ids(redis_client: redis.Redis, job_ids: List[int]):
+    """Record jobs just created (after their commit) in the shared and local id sets"""
+    for job_id in job_ids:
+        known_job_ids.add(job_id)
+    if job_ids:
+        _update_known_job_ids(redis_client, "SADD", job_ids)
+
+def remove_known_job_ids(redis_client: redis.Redis, job_ids: List[int]):
+    """Drop deleted jobs (after their commit) from the shared and local id sets"""
+    for job_id in job_ids:
+        known_job_ids.discard(job_id)
+    if job_ids:
+        _update_known_job_ids(redis_client, "SREM", job_ids)
+
+class ViewBuffer:
+    """Aggregates page views in-process and flushes them as one pipeline"""
+    def __init__(self):
+        self._counts = Counter()
+        self._visitors = defaultdict(set)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, job_id: int, visitor_id: Optional[str] = None):
+        with self._lock:
+            self._counts[job_id] += 1
+            if visitor_id:
+                self._visitors[job_id].add(visitor_id)
+
+    def pending(self, job_id: int) -> int:
+        """Views of a job buffered in this worker and not yet flushed"""
+        with self._lock:
+            return self._counts.get(job_id, 0)
+
+    def flush(self, redis_client: redis.Redis) -> int:
+        """Write pending views to Redis; returns how many were flushed"""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            visitors, self._visitors = self._visitors, defaultdict(set)
+        if not counts:
+            return 0
+
+        at = datetime.utcnow()
+        try:
+            # Workers accept ids from their own copy of the known set, which
+            # may still hold a job deleted since; drop its views here
+            job_ids = list(counts)
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.exists(KNOWN_JOB_IDS_KEY)
+            for job_id in job_ids:
+                pipe.sismember(KNOWN_JOB_IDS_KEY, job_id)
+            known, *members = pipe.execute()
+            if known:
+                for job_id, is_member in zip(job_ids, members):
+                    if not is_member:
+                        del counts[job_id]
+                        visitors.pop(job_id, None)
+
+            pipe = redis_client.pipeline(transaction=False)
+            for job_id, count in counts.items():
+                record_views(pipe, job_id, count, at)
+            for job_id, visitor_ids in visitors.items():
+                pipe.pfadd(f"{UNIQUE_VISITORS_PREFIX}{job_id}", *visitor_ids)
+                pipe.pfadd(daily_unique_key(at, job_id), *visitor_ids)
+                pipe.expire(daily_unique_key(at, job_id), DAILY_UNIQUE_VISITORS_TTL)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis view flush error: {e}")
+            # Put the views back so the next flush retries them
+            with self._lock:
+                self._counts.update(counts)
+                for job_id, visitor_ids in visitors.items():
+                    self._visitors[job_id].update(visitor_ids)
+            return 0
+        return sum(counts.values())
+
+    def start(self, get_redis_client: Callable[[], redis.Redis], interval: float = VIEW_FLUSH_INTERVAL):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.flush(get_redis_client())
+
+        self._thread = threading.Thread(target=run, name="job-view-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, get_redis_client: Callable[[], redis.Redis]):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        # Don't lose views buffered since the last tick
+        self.flush(get_redis_client())
+
+known_job_ids = KnownJobIds()
+view_buffer = ViewBuffer()
@@ -3,18 +3,40 @@ import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base, cleanup
+from database import engine, Base, cleanup, cleanup_async, db_pool_stats, read_replicas, circuit_open_handler
+from circuit_breaker import CircuitOpenError
 from routers import jobs, applications, auth, employer_inquiries, agency_analytics, sessions, contact_inquiries
-from redis_config import redis_client
+from pagination import NEXT_CURSOR_HEADER
+from compression import CompressionMiddleware
+from pool_metrics import DbMetricsMiddleware
+from redis_config import redis_client, get_redis, start_invalidation_listener, stop_invalidation_listener, get_cache_stats
+from job_views import view_buffer
+from cache_warmer import cache_warmer, search_terms
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     # Create database tables
     Base.metadata.create_all(bind=engine)
+    # Keep this worker's in-process cache in sync with other workers
+    start_invalidation_listener()
+    # Flush buffered job views and search counts to Redis in batches
+    view_buffer.start(get_redis)
+    search_terms.start(get_redis)
+    # Refill the hottest job pages in the background after a deploy
+    cache_warmer.start()
+    cache_warmer.request()
+    # Track replica health and lag for the read-only endpoints
+    read_replicas.start()
     yield
     # Shutdown
+    read_replicas.stop()
+    cache_warmer.stop()
+    view_buffer.stop(get_redis)
+    search_terms.stop(get_redis)
+    stop_invalidation_listener()
     cleanup()
+    await cleanup_async()
     redis_client.close()
 
 app = FastAPI(
@@ -32,8 +54,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],  # Let browsers read pagination cursors and validators
 )
 
+# gzip/brotli for large responses; precompressed cache hits pass through as-is
+app.add_middleware(CompressionMiddleware)
+
+# Per-route connection checkouts, waits and hold times for /db-pool-stats
+app.add_middleware(DbMetricsMiddleware)
+
+# Checkouts refused by the primary's open circuit breaker answer 503
+app.add_exception_handler(CircuitOpenError, circuit_open_handler)
+
 # Include routers
 app.include_router(jobs.router, prefix="/api", tags=["jobs"])
 app.include_router(applications.router, prefix="/api", tags=["applications"])
@@ -76,6 +108,14 @@ def redis_check():
     except Exception as e:
         return {"redis": "error", "details": str(e)}
 
+@app.get("/cache-stats")
+def cache_stats():
+    return {**get_cache_stats(), "warmer": cache_warmer.to_dict()}
+
+@app.get("/db-pool-stats")
+def pool_stats():
+    return db_pool_stats()
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
\ No newline at end of file
@@ -0,0 +1,25 @@
+from dotenv import load_dotenv
+from redis_config import get_redis
+from job_views import LEADERBOARD_KEY
+
+load_dotenv()
+
+def migrate_job_views_to_leaderboard():
+    """Fold legacy job_views:<id> counters into the all-time leaderboard ZSET"""
+    redis_client = get_redis()
+    migrated = 0
+    # SCAN rather than KEYS so the migration doesn't block Redis
+    for key in redis_client.scan_iter(match="job_views:*", count=500):
+        job_id = key.partition(":")[2]
+        if not job_id.isdigit():
+            continue  # leaderboard, time buckets, etc.
+        views = redis_client.get(key)
+        if views:
+            redis_client.zincrby(LEADERBOARD_KEY, int(views), job_id)
+            redis_client.delete(key)
+            migrated += 1
+
+    print(f"Migrated view counts for {migrated} jobs into {LEADERBOARD_KEY}")
+
+if __name__ == "__main__":
+    migrate_job_views_to_leaderboard()
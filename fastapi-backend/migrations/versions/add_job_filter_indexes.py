@@ -0,0 +1,33 @@
+"""Add composite indexes for filtered job listings
+
+Revision ID: add_job_filter_indexes
+Revises: add_job_suggest_trgm
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_job_filter_indexes'
+down_revision = 'add_job_suggest_trgm'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Each index leads with the filter column(s) and ends with the listing's
+    # (posted_date, id) sort so filtered pages are read in index order.
+    op.create_index(
+        'ix_jobs_status_type_posted_date_id', 'jobs', ['status', 'type', 'posted_date', 'id']
+    )
+    op.create_index('ix_jobs_location_posted_date_id', 'jobs', ['location', 'posted_date', 'id'])
+    op.create_index(
+        'ix_jobs_passport_required_posted_date_id', 'jobs', ['passport_required', 'posted_date', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_jobs_passport_required_posted_date_id', table_name='jobs')
+    op.drop_index('ix_jobs_location_posted_date_id', table_name='jobs')
+    op.drop_index('ix_jobs_status_type_posted_date_id', table_name='jobs')
@@ -0,0 +1,34 @@
+"""Add trigram indexes for job autocomplete
+
+Revision ID: add_job_suggest_trgm
+Revises: add_job_search_vector
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_job_suggest_trgm'
+down_revision = 'add_job_search_vector'
+branch_labels = None
+depends_on = None
+
+SUGGEST_COLUMNS = ('title', 'company', 'location')
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in SUGGEST_COLUMNS:
+        op.create_index(
+            f'ix_jobs_{column}_trgm',
+            'jobs',
+            [column],
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'}
+        )
+
+
+def downgrade() -> None:
+    for column in SUGGEST_COLUMNS:
+        op.drop_index(f'ix_jobs_{column}_trgm', table_name='jobs')
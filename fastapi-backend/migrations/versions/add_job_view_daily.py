@@ -0,0 +1,32 @@
+"""Add job_view_daily rollup table
+
+Revision ID: add_job_view_daily
+Revises: add_job_filter_indexes
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_job_view_daily'
+down_revision = 'add_job_filter_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job_view_daily',
+        sa.Column('job_id', sa.Integer(), sa.ForeignKey('jobs.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('view_date', sa.Date(), nullable=False),
+        sa.Column('views', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('unique_visitors', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.PrimaryKeyConstraint('job_id', 'view_date')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_view_daily')
@@ -0,0 +1,34 @@
+"""Add indexes backing keyset pagination on list endpoints
+
+Revision ID: add_keyset_pagination_indexes
+Revises: add_flexible_documents, add_inquiry_management_fields
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+# Also merges the two existing heads into a single history.
+revision = 'add_keyset_pagination_indexes'
+down_revision = ('add_flexible_documents', 'add_inquiry_management_fields')
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_jobs_posted_date_id', 'jobs', ['posted_date', 'id'])
+    op.create_index('ix_job_applications_applied_date_id', 'job_applications', ['applied_date', 'id'])
+    op.create_index(
+        'ix_employer_inquiries_priority_created_at_id',
+        'employer_inquiries',
+        ['priority', 'created_at', 'id']
+    )
+    op.create_index('ix_contact_inquiries_created_at_id', 'contact_inquiries', ['created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contact_inquiries_created_at_id', table_name='contact_inquiries')
+    op.drop_index('ix_employer_inquiries_priority_created_at_id', table_name='employer_inquiries')
+    op.drop_index('ix_job_applications_applied_date_id', table_name='job_applications')
+    op.drop_index('ix_jobs_posted_date_id', table_name='jobs')
@@ -0,0 +1,62 @@
+"""Add indexes for the agency analytics joins and filtered inquiry lists
+
+Revision ID: add_router_query_indexes
+Revises: add_job_view_daily
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_router_query_indexes'
+down_revision = 'add_job_view_daily'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, partial index predicate)
+INDEXES = (
+    # Agency analytics: users -> jobs -> job_applications joins
+    ('ix_users_agency_id', 'users', ['agency_id'], None),
+    # ... and the 30-day posting trend per employer
+    ('ix_jobs_employer_id_posted_date', 'jobs', ['employer_id', 'posted_date'], None),
+    # Applications of a job, newest first (analytics joins, job-filtered exports)
+    ('ix_job_applications_job_id_applied_date_id', 'job_applications', ['job_id', 'applied_date', 'id'], None),
+    # selectinload of an application page's documents
+    ('ix_application_documents_application_id', 'application_documents', ['application_id'], None),
+    # Agency dashboard: recent and urgent inquiries of one agency
+    ('ix_employer_inquiries_agency_id_created_at', 'employer_inquiries', ['agency_id', 'created_at'], None),
+    ('ix_employer_inquiries_agency_id_urgent', 'employer_inquiries', ['agency_id'], 'is_urgent'),
+    # Status-filtered inquiry list, in its (priority, created_at, id) order
+    (
+        'ix_employer_inquiries_status_priority_created_at_id',
+        'employer_inquiries',
+        ['status', 'priority', 'created_at', 'id'],
+        None,
+    ),
+    # Read/unread contact inquiry list, newest first
+    ('ix_contact_inquiries_is_read_created_at_id', 'contact_inquiries', ['is_read', 'created_at', 'id'], None),
+)
+
+
+def upgrade() -> None:
+    # CONCURRENTLY doesn't lock out writes while the index builds, but it
+    # can't run inside a transaction. A build that fails leaves an INVALID
+    # index behind; drop it before re-running, as IF NOT EXISTS skips it.
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
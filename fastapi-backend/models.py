@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, ARRAY, DateTime, ForeignKey, Enum, Date, Boolean, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, ARRAY, DateTime, ForeignKey, Enum, Date, Boolean, JSON, Index, Computed, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 import enum
 from database import Base
@@ -52,6 +53,16 @@ class DocumentType(str, enum.Enum):
     MEDICAL_CERTIFICATE = "medical_certificate"
     OTHER = "other"
 
+# Weighted full-text document for job search: title ranks highest, then
+# company/location, then the description body.
+JOB_SEARCH_CONFIG = "english"
+JOB_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(company, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
 class Agency(Base):
     __tablename__ = "agencies"
 
@@ -79,6 +90,11 @@ class User(Base):
     agency = relationship("Agency", back_populates="users")
     jobs = relationship("Job", back_populates="employer")
 
+    __table_args__ = (
+        # Agency analytics joins
+        Index("ix_users_agency_id", "agency_id"),
+    )
+
 class Job(Base):
     __tablename__ = "jobs"
 
@@ -95,10 +111,37 @@ class Job(Base):
     employer_id = Column(Integer, ForeignKey("users.id"))
     passport_required = Column(Boolean, default=False)
     required_documents = Column(JSON, nullable=True)  # Store array of required document types
+    # Maintained by Postgres as a stored generated column; only loaded when asked for
+    search_vector = deferred(Column(TSVECTOR, Computed(JOB_SEARCH_VECTOR_SQL, persisted=True)))
 
     employer = relationship("User", back_populates="jobs")
     applications = relationship("JobApplication", back_populates="job")
 
+    __table_args__ = (
+        # Keyset pagination for /jobs/ (newest first)
+        Index("ix_jobs_posted_date_id", "posted_date", "id"),
+        # Filtered listings on /jobs/, still ordered by (posted_date, id)
+        Index("ix_jobs_status_type_posted_date_id", "status", "type", "posted_date", "id"),
+        Index("ix_jobs_location_posted_date_id", "location", "posted_date", "id"),
+        Index("ix_jobs_passport_required_posted_date_id", "passport_required", "posted_date", "id"),
+        Index("ix_jobs_search_vector", "search_vector", postgresql_using="gin"),
+        # Agency analytics: an employer's jobs and their posting trend
+        Index("ix_jobs_employer_id_posted_date", "employer_id", "posted_date"),
+        # Trigram indexes for /jobs/suggest need the pg_trgm extension, so they
+        # are only created by the add_job_suggest_trgm migration.
+    )
+
+class JobViewDaily(Base):
+    """Durable per-day view counts, rolled up from the Redis view buckets"""
+    __tablename__ = "job_view_daily"
+
+    # (job_id, view_date) primary key also serves per-job date-range scans
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    view_date = Column(Date, primary_key=True)
+    views = Column(Integer, nullable=False, default=0)
+    unique_visitors = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class JobApplication(Base):
     __tablename__ = "job_applications"
 
@@ -115,6 +158,13 @@ class JobApplication(Base):
     job = relationship("Job", back_populates="applications")
     documents = relationship("ApplicationDocument", back_populates="application")
 
+    __table_args__ = (
+        # Keyset pagination for /applications/
+        Index("ix_job_applications_applied_date_id", "applied_date", "id"),
+        # Applications of one job (analytics joins, job-filtered exports)
+        Index("ix_job_applications_job_id_applied_date_id", "job_id", "applied_date", "id"),
+    )
+
 class ApplicationDocument(Base):
     __tablename__ = "application_documents"
     
@@ -127,6 +177,11 @@ class ApplicationDocument(Base):
     
     application = relationship("JobApplication", back_populates="documents")
 
+    __table_args__ = (
+        # selectinload of an application page's documents
+        Index("ix_application_documents_application_id", "application_id"),
+    )
+
 class EmployerInquiry(Base):
     __tablename__ = "employer_inquiries"
 
@@ -149,6 +204,16 @@ class EmployerInquiry(Base):
 
     agency = relationship("Agency", back_populates="inquiries")
 
+    __table_args__ = (
+        # Keyset pagination for /employer-inquiries/ (priority, then newest)
+        Index("ix_employer_inquiries_priority_created_at_id", "priority", "created_at", "id"),
+        # The same order within one status (status-filtered list)
+        Index("ix_employer_inquiries_status_priority_created_at_id", "status", "priority", "created_at", "id"),
+        # Agency dashboard: recent and urgent inquiries of one agency
+        Index("ix_employer_inquiries_agency_id_created_at", "agency_id", "created_at"),
+        Index("ix_employer_inquiries_agency_id_urgent", "agency_id", postgresql_where=text("is_urgent")),
+    )
+
 class ContactInquiry(Base):
     __tablename__ = "contact_inquiries"
 
@@ -161,4 +226,11 @@ class ContactInquiry(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     is_read = Column(Boolean, default=False)
     response = Column(Text, nullable=True)  # Admin can add response
-    responded_at = Column(DateTime, nullable=True)
\ No newline at end of file
+    responded_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Keyset pagination for /contact-inquiries/ (newest first)
+        Index("ix_contact_inquiries_created_at_id", "created_at", "id"),
+        # Read/unread filtered list, newest first
+        Index("ix_contact_inquiries_is_read_created_at_id", "is_read", "created_at", "id"),
+    )
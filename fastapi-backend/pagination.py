@@ -0,0 +1,124 @@
+"""
+Keyset (cursor) pagination helpers.
+
+List endpoints sort on a tuple of columns ending in the primary key, all
+descending. The cursor is an opaque, URL-safe token holding the sort values
+of the last row on a page; the next page is everything strictly "after" that
+tuple, which an index on the same columns can serve without scanning the
+skipped rows. The cursor for the next page is returned in the X-Next-Cursor
+response header so list bodies keep their existing shape.
+
+Sort columns may be nullable: NULLs sort first (PostgreSQL's default for
+DESC, so the same indexes still apply) and a cursor holding a NULL is
+compared NULL-aware, so those rows are paged like any other.
+"""
+import base64
+import enum
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import Select, and_, literal, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def _encode_value(value: Any):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def _decode_value(value: Any):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode a row's sort values into an opaque cursor"""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor produced by encode_cursor, rejecting malformed input"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("cursor has the wrong shape")
+        return [_decode_value(v) for v in values]
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+def _after(sort_columns: Sequence, values: Sequence[Any]):
+    """Rows strictly after a cursor in (DESC NULLS FIRST) sort order"""
+    # Bind each value with its column's type so enums/datetimes convert as usual
+    bound = [
+        None if value is None else literal(value, column.type)
+        for column, value in zip(sort_columns, values)
+    ]
+    if all(value is not None for value in bound):
+        # Exact without NULLs in the cursor: the row comparison only reaches
+        # a NULL on a row that ties the cursor up to that column, and such a
+        # row sorts before it. An index range scan can serve this form.
+        return tuple_(*sort_columns) < tuple_(*bound)
+    # Spell the comparison out column by column, as "=" and "<" are NULL for
+    # NULL values: equal on the columns before i and after the cursor on i
+    clauses = []
+    for i, (column, value) in enumerate(zip(sort_columns, bound)):
+        equal = [
+            previous.is_(None) if previous_value is None else previous == previous_value
+            for previous, previous_value in zip(sort_columns[:i], bound[:i])
+        ]
+        after = column.is_not(None) if value is None else column < value
+        clauses.append(and_(*equal, after))
+    return or_(*clauses)
+
+def page_query(query, sort_columns: Sequence, limit: int, cursor: Optional[str] = None, skip: int = 0):
+    """Sort and limit a query to one page; keyset_paginate runs the result"""
+    # Works on both ORM Query objects and select() statements
+    query = query.order_by(*[column.desc().nulls_first() for column in sort_columns])
+    if cursor:
+        values = decode_cursor(cursor, len(sort_columns))
+        query = query.filter(_after(sort_columns, values))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def _next_cursor(rows: Sequence, sort_columns: Sequence, limit: int) -> Optional[str]:
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        return encode_cursor([getattr(last, column.key) for column in sort_columns])
+    return None
+
+def keyset_paginate(
+    query: Query,
+    sort_columns: Sequence,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0
+) -> Tuple[list, Optional[str]]:
+    """Return one page of rows and the cursor for the following page.
+
+    With a cursor the page starts right after it and `skip` is ignored;
+    without one, `skip` is applied as an offset for backward compatibility.
+    """
+    rows = page_query(query, sort_columns, limit, cursor, skip).all()
+    return rows, _next_cursor(rows, sort_columns, limit)
+
+async def keyset_paginate_async(
+    db: AsyncSession,
+    stmt: Select,
+    sort_columns: Sequence,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0
+) -> Tuple[list, Optional[str]]:
+    """keyset_paginate for a select() of one entity, run on an AsyncSession"""
+    rows = (await db.scalars(page_query(stmt, sort_columns, limit, cursor, skip))).all()
+    return rows, _next_cursor(rows, sort_columns, limit)
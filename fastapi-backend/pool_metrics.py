@@ -0,0 +1,265 @@
+"""
+Connection pool metrics.
+
+instrumented_pool() wraps a SQLAlchemy pool class so that every connection
+checkout is timed (the wait for a free connection, plus connecting when the
+pool grows) and checkouts that hit pool_timeout are counted.
+instrument_engine() adds checkout/checkin listeners that time how long each
+connection is held. DbMetricsMiddleware attributes checkouts, waits and hold
+time to the route of the request that made them.
+
+Together with the pool's live state (size, checked out, overflow) these are
+served at /db-pool-stats, so the pool can be sized from data: waits piling
+up in the high histogram buckets, or any timeouts, mean the pool is too
+small for the load; a checked-out count that never gets near the size means
+it is too big; a route with long holds or many checkouts per request is
+where connections go.
+
+Everything is kept in memory as plain counters (no logging or formatting on
+the checkout path), per process (per worker), and reset on restart.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Type
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+from starlette.types import ASGIApp, Receive, Scope, Send
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# Upper bounds (ms) of the wait/hold histogram buckets; the last bucket is +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+class Histogram:
+    """Count, sum, max and bucket counts of durations (not thread-safe; callers lock)"""
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect_left(WAIT_BUCKETS_MS, seconds * 1000)] += 1
+
+    def to_dict(self, name: str) -> Dict:
+        histogram = {
+            f"le_{bound}ms": count for bound, count in zip(WAIT_BUCKETS_MS, self.buckets)
+        }
+        histogram["le_inf"] = self.buckets[-1]
+        return {
+            f"{name}_ms_avg": round(self.total / self.count * 1000, 3) if self.count else None,
+            f"{name}_ms_max": round(self.max * 1000, 3),
+            # Observations per bucket (not cumulative)
+            f"{name}_histogram": histogram,
+        }
+
+class PoolMetrics:
+    """Thread-safe checkout counters for one pool"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        self.errors = 0
+        self.wait = Histogram()
+        self.hold = Histogram()
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.wait.add(seconds)
+
+    def record_hold(self, seconds: float):
+        with self._lock:
+            self.hold.add(seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "checkouts": self.wait.count,
+                "timeouts": self.timeouts,
+                # Failed connects other than timeouts (e.g. database unreachable)
+                "errors": self.errors,
+                **self.wait.to_dict("wait"),
+                # Checkout to checkin, i.e. how long a request kept the connection
+                **self.hold.to_dict("hold"),
+            }
+
+class RequestDbUsage:
+    """Connection use of one request, filled in by the pool hooks"""
+    __slots__ = ("checkouts", "wait", "hold")
+
+    def __init__(self):
+        self.checkouts = 0
+        self.wait = 0.0
+        self.hold = 0.0
+
+# The current request's usage; copied into threadpool workers and greenlets
+# with the rest of the context, so sync endpoints and AsyncSession both see it
+_request_usage: ContextVar[Optional[RequestDbUsage]] = ContextVar("request_db_usage", default=None)
+
+def instrumented_pool(
+    pool_class: Type[Pool],
+    metrics: PoolMetrics,
+    breaker: Optional[CircuitBreaker] = None
+) -> Type[Pool]:
+    """Subclass of pool_class that records checkouts in metrics.
+
+    A subclass rather than pool events: the checkout event fires only after a
+    connection was obtained, so it can't see the wait or a timeout. The
+    subclass survives engine.dispose(), which recreates the pool from its
+    class.
+
+    With a breaker, each checkout first asks it and raises CircuitOpenError
+    while it is open, so half-open probes are always real connection
+    attempts; the outcome (including the pre-ping and any reconnect) is
+    reported back. Pool timeouts are not: an exhausted pool doesn't mean the
+    database is down.
+    """
+    class InstrumentedPool(pool_class):
+        def connect(self):
+            if breaker is None:
+                return super().connect()
+            if not breaker.allow():
+                raise CircuitOpenError(breaker)
+            try:
+                connection = super().connect()
+            except exc.TimeoutError:
+                raise
+            except Exception as e:
+                breaker.record_failure(e)
+                raise
+            breaker.record_success()
+            return connection
+
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                metrics.record_timeout()
+                raise
+            except Exception:
+                metrics.record_error()
+                raise
+            waited = time.perf_counter() - started
+            metrics.record_wait(waited)
+            usage = _request_usage.get()
+            if usage is not None:
+                usage.checkouts += 1
+                usage.wait += waited
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    InstrumentedPool.__qualname__ = InstrumentedPool.__name__
+    return InstrumentedPool
+
+def instrument_engine(engine: Engine, metrics: PoolMetrics):
+    """Time how long each of the (sync) engine's connections stays checked out"""
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = (time.perf_counter(), _request_usage.get())
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        checked_out = connection_record.info.pop("checked_out_at", None)
+        if checked_out is None:
+            return
+        started, usage = checked_out
+        held = time.perf_counter() - started
+        metrics.record_hold(held)
+        if usage is not None:
+            usage.hold += held
+
+def pool_status(pool: Pool) -> Dict:
+    """Live state of a pool; NullPool has no size to report"""
+    if not hasattr(pool, "checkedout"):
+        return {"pool_class": type(pool).__name__}
+    return {
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # Connections open beyond size (negative while the pool is still filling)
+        "overflow": pool.overflow(),
+        "timeout": pool.timeout(),
+    }
+
+class RouteDbMetrics:
+    """Per-route totals of the connection use of requests"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict] = {}
+
+    def record(self, route: str, usage: RequestDbUsage):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    "requests": 0, "requests_using_db": 0, "checkouts": 0,
+                    "max_checkouts": 0, "wait": 0.0, "hold": 0.0, "max_hold": 0.0,
+                }
+            stats["requests"] += 1
+            if usage.checkouts:
+                stats["requests_using_db"] += 1
+                stats["checkouts"] += usage.checkouts
+                stats["max_checkouts"] = max(stats["max_checkouts"], usage.checkouts)
+                stats["wait"] += usage.wait
+                stats["hold"] += usage.hold
+                stats["max_hold"] = max(stats["max_hold"], usage.hold)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            routes = {route: dict(stats) for route, stats in self._routes.items()}
+        result = {}
+        # Routes holding connections the longest in total first
+        for route, stats in sorted(routes.items(), key=lambda item: -item[1]["hold"]):
+            requests = stats["requests"]
+            result[route] = {
+                "requests": requests,
+                "requests_using_db": stats["requests_using_db"],
+                "checkouts_per_request": round(stats["checkouts"] / requests, 3),
+                "max_checkouts_per_request": stats["max_checkouts"],
+                "wait_ms_per_request": round(stats["wait"] / requests * 1000, 3),
+                "hold_ms_per_request": round(stats["hold"] / requests * 1000, 3),
+                "max_hold_ms_per_request": round(stats["max_hold"] * 1000, 3),
+                "hold_ms_total": round(stats["hold"] * 1000, 3),
+            }
+        return result
+
+route_db_metrics = RouteDbMetrics()
+
+class DbMetricsMiddleware:
+    """Attribute each request's checkouts, wait and hold time to its route.
+
+    Runs around the whole response, so connections held while a body
+    streams (exports) count too. Requests that matched no route are
+    grouped under "unmatched".
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        usage = RequestDbUsage()
+        token = _request_usage.set(usage)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_usage.reset(token)
+            # The router adds the matched route to the (shared) scope
+            route = scope.get("route")
+            path = getattr(route, "path", None)
+            route_db_metrics.record(f"{scope['method']} {path}" if path else "unmatched", usage)
@@ -0,0 +1,158 @@
+"""
+Read-replica health tracking.
+
+Each replica from DATABASE_REPLICA_URLS gets its own sync and async engine
+(see database.py). A background thread checks every replica each
+REPLICA_CHECK_INTERVAL seconds: it must be reachable and its replay lag
+must be at most REPLICA_MAX_LAG seconds. Read sessions use the healthy
+replicas in turn and fall back to the primary when there is none. A
+replica that fails a connect during a request is taken out at once and
+comes back at the first check that passes.
+
+Until the first check has run (and in processes that never start the
+monitor, such as Celery workers and scripts) every read goes to the
+primary.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from pool_metrics import PoolMetrics, pool_status
+
+logger = logging.getLogger(__name__)
+
+# Seconds the replica is behind the primary. 0 when it is streaming from the
+# primary and has replayed all WAL it received (an idle primary writes no new
+# transactions, so "now - last replayed transaction" alone would keep
+# growing). A standby whose WAL receiver isn't streaming receives nothing, so
+# "replayed everything" means nothing there: it gets NULL, i.e. unhealthy.
+# Not a standby at all (pg_is_in_recovery() false) counts as 0.
+#
+# pg_stat_wal_receiver shows everything but pid as NULL to roles without
+# pg_read_all_stats, so a running receiver is recognised by its pid. Its
+# status is only checked when the role can see it; grant pg_read_all_stats
+# to the app role to also catch a receiver that is up but still connecting.
+REPLICATION_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver
+            WHERE pid IS NOT NULL AND COALESCE(status, 'streaming') = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class Replica:
+    """One read replica: its engines, pool metrics and last health check"""
+    def __init__(
+        self,
+        url: str,
+        engine: Engine,
+        async_engine: AsyncEngine,
+        check_engine: Engine,
+        metrics: PoolMetrics,
+        async_metrics: PoolMetrics
+    ):
+        # Host and database only; the URL carries the password
+        parsed = make_url(url)
+        self.name = f"{parsed.host}:{parsed.port or 5432}/{parsed.database}"
+        self.engine = engine
+        self.async_engine = async_engine
+        # Unpooled, so checks never wait behind (or hold) a request's connection
+        self.check_engine = check_engine
+        self.metrics = metrics
+        self.async_metrics = async_metrics
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "error": self.error,
+            "checked_at": self.checked_at,
+            "sync": {**pool_status(self.engine.pool), **self.metrics.to_dict()},
+            "async": {**pool_status(self.async_engine.pool), **self.async_metrics.to_dict()},
+        }
+
+class ReplicaSet:
+    """The configured replicas, checked in the background and handed out in turn"""
+    def __init__(self, replicas: List[Replica], max_lag: float, check_interval: float):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._next = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def pick(self) -> Optional[Replica]:
+        """A healthy replica (round robin), or None to read from the primary"""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    def mark_down(self, replica: Replica, error: Exception):
+        """Stop using a replica until its next successful check"""
+        message = str(getattr(error, "orig", error)).strip()
+        if replica.healthy:
+            logger.warning(f"Read replica {replica.name} down, reading from primary: {message}")
+        replica.healthy = False
+        replica.error = message
+
+    def check(self, replica: Replica):
+        try:
+            with replica.check_engine.connect() as connection:
+                lag = connection.execute(REPLICATION_LAG_QUERY).scalar()
+            if lag is None:
+                raise RuntimeError("WAL receiver is not streaming from the primary")
+            lag = float(lag)
+        except Exception as e:
+            self.mark_down(replica, e)
+        else:
+            replica.lag = round(lag, 3)
+            replica.error = None if lag <= self.max_lag else f"lag {lag:.1f}s exceeds {self.max_lag:g}s"
+            if replica.healthy != (lag <= self.max_lag):
+                logger.warning(f"Read replica {replica.name}: {replica.error or 'back in rotation'}")
+            replica.healthy = lag <= self.max_lag
+        replica.checked_at = time.time()
+
+    def check_all(self):
+        for replica in self.replicas:
+            self.check(replica)
+
+    def start(self):
+        if self._thread is not None or not self.replicas:
+            return
+        self._stop.clear()
+
+        def run():
+            while True:
+                self.check_all()
+                if self._stop.wait(self.check_interval):
+                    break
+
+        self._thread = threading.Thread(target=run, name="read-replica-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "max_lag_seconds": self.max_lag,
+            "check_interval_seconds": self.check_interval,
+            "replicas": [replica.to_dict() for replica in self.replicas],
+        }
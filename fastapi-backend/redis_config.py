@@ -1,8 +1,23 @@
 import redis
 import os
-from typing import Optional
+import sys
+from typing import Callable, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+import enum
 import json
 import logging
+import threading
+import time
+import uuid
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 logger = logging.getLogger(__name__)
 
@@ -10,23 +25,35 @@ class RedisClient:
     def __init__(self):
         self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
         self.redis_client: Optional[redis.Redis] = None
+        self.binary_client: Optional[redis.Redis] = None
     
     def get_redis_client(self) -> redis.Redis:
         """Get synchronous Redis client"""
         if not self.redis_client:
-            self.redis_client = redis.from_url(
-                self.redis_url, 
-                decode_responses=True,
-                health_check_interval=30,
-                socket_connect_timeout=5,
-                socket_timeout=5
-            )
+            self.redis_client = self._connect(decode_responses=True)
         return self.redis_client
     
+    def get_binary_client(self) -> redis.Redis:
+        """Get a Redis client that returns bytes (for compressed payloads)"""
+        if not self.binary_client:
+            self.binary_client = self._connect(decode_responses=False)
+        return self.binary_client
+    
+    def _connect(self, decode_responses: bool) -> redis.Redis:
+        return redis.from_url(
+            self.redis_url, 
+            decode_responses=decode_responses,
+            health_check_interval=30,
+            socket_connect_timeout=5,
+            socket_timeout=5
+        )
+    
     def close(self):
         """Close Redis connections"""
         if self.redis_client:
             self.redis_client.close()
+        if self.binary_client:
+            self.binary_client.close()
 
 # Global Redis instance
 redis_client = RedisClient()
@@ -35,17 +62,327 @@ def get_redis() -> redis.Redis:
     """Dependency to get Redis client"""
     return redis_client.get_redis_client()
 
+def get_redis_binary() -> redis.Redis:
+    """Redis client for binary values"""
+    return redis_client.get_binary_client()
+
+# Value codecs for RedisCache.get/set. Stored values are framed as
+# <codec tag><compression flag><body>; values written before framing was
+# introduced are plain JSON and are still read.
+CACHE_CODEC = os.getenv("CACHE_CODEC", "msgpack" if msgpack is not None else "json")
+CACHE_COMPRESS_MIN_SIZE = int(os.getenv("CACHE_COMPRESS_MIN_SIZE", "4096"))  # bytes
+CACHE_COMPRESS_LEVEL = int(os.getenv("CACHE_COMPRESS_LEVEL", "1"))  # favour speed
+
+class JsonCodec:
+    """Plain JSON; datetimes, enums etc. come back as strings"""
+    name = "json"
+    tag = b"j"
+
+    def encode(self, value) -> bytes:
+        return json.dumps(value, default=str).encode()
+
+    def decode(self, data: bytes):
+        return json.loads(data)
+
+_EXT_DATETIME = 1
+_EXT_DATE = 2
+_EXT_ENUM = 3
+_EXT_DECIMAL = 4
+
+def _resolve_enum(name: str):
+    """Find an enum class by "module:qualname" among already imported modules"""
+    module, _, qualname = name.partition(":")
+    target = sys.modules.get(module)
+    for part in qualname.split("."):
+        target = getattr(target, part, None)
+    if isinstance(target, type) and issubclass(target, enum.Enum):
+        return target
+    return None
+
+class MsgpackCodec:
+    """msgpack with extension types so datetimes, dates, enums and decimals round-trip exactly"""
+    name = "msgpack"
+    tag = b"m"
+
+    def __init__(self):
+        # Enum members are few, so their ext payloads (b"module:qualname\0" +
+        # packed value) are built and resolved once per member
+        self._enum_exts = {}
+        self._enum_members = {}
+
+    def _default(self, obj):
+        if isinstance(obj, enum.Enum):
+            ext = self._enum_exts.get(obj)
+            if ext is None:
+                cls = type(obj)
+                header = f"{cls.__module__}:{cls.__qualname__}\0".encode()
+                ext = self._enum_exts[obj] = msgpack.ExtType(
+                    _EXT_ENUM, header + msgpack.packb(obj.value, use_bin_type=True)
+                )
+            return ext
+        if isinstance(obj, datetime):
+            return msgpack.ExtType(_EXT_DATETIME, obj.isoformat().encode())
+        if isinstance(obj, date):
+            return msgpack.ExtType(_EXT_DATE, obj.isoformat().encode())
+        if isinstance(obj, Decimal):
+            return msgpack.ExtType(_EXT_DECIMAL, str(obj).encode())
+        # strict_types routes subclasses (and tuples) here too
+        if isinstance(obj, (list, tuple)):
+            return list(obj)
+        if isinstance(obj, dict):
+            return dict(obj)
+        raise TypeError(f"Cannot cache values of type {type(obj).__name__}")
+
+    def _ext_hook(self, code: int, data: bytes):
+        if code == _EXT_ENUM:
+            member = self._enum_members.get(data)
+            if member is None:
+                name, _, packed = data.partition(b"\0")
+                value = msgpack.unpackb(packed, raw=False)
+                cls = _resolve_enum(name.decode())
+                if cls is None:
+                    # Enum not imported in this process; fall back to its value
+                    return value
+                member = self._enum_members[data] = cls(value)
+            return member
+        if code == _EXT_DATETIME:
+            return datetime.fromisoformat(data.decode())
+        if code == _EXT_DATE:
+            return date.fromisoformat(data.decode())
+        if code == _EXT_DECIMAL:
+            return Decimal(data.decode())
+        return msgpack.ExtType(code, data)
+
+    def encode(self, value) -> bytes:
+        # strict_types: str-based enums would otherwise be packed as plain strings
+        return msgpack.packb(value, default=self._default, use_bin_type=True, strict_types=True)
+
+    def decode(self, data: bytes):
+        return msgpack.unpackb(data, ext_hook=self._ext_hook, raw=False, strict_map_key=False)
+
+CODECS = {codec.tag: codec for codec in [JsonCodec()] + ([MsgpackCodec()] if msgpack is not None else [])}
+CODECS_BY_NAME = {codec.name: codec for codec in CODECS.values()}
+if CACHE_CODEC not in CODECS_BY_NAME:
+    logger.warning(f"Cache codec {CACHE_CODEC!r} is unavailable, falling back to json")
+default_codec = CODECS_BY_NAME.get(CACHE_CODEC, CODECS[JsonCodec.tag])
+COMPRESSED_FLAG = b"z"
+UNCOMPRESSED_FLAG = b"-"
+
+def encode_value(value, codec=None) -> bytes:
+    """Serialize a cache value, zlib-compressing it above CACHE_COMPRESS_MIN_SIZE"""
+    codec = codec or default_codec
+    body = codec.encode(value)
+    if len(body) >= CACHE_COMPRESS_MIN_SIZE:
+        return codec.tag + COMPRESSED_FLAG + zlib.compress(body, CACHE_COMPRESS_LEVEL)
+    return codec.tag + UNCOMPRESSED_FLAG + body
+
+def decode_value(data: bytes):
+    """Inverse of encode_value; also reads unframed JSON written by older versions"""
+    codec = CODECS.get(data[:1])
+    if codec is None:
+        return json.loads(data)
+    body = data[2:]
+    if data[1:2] == COMPRESSED_FLAG:
+        body = zlib.decompress(body)
+    return codec.decode(body)
+
+# In-process cache tier (per worker). Disabled unless LOCAL_CACHE_MAX_ENTRIES > 0.
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "0"))
+LOCAL_CACHE_MAX_BYTES = int(os.getenv("LOCAL_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+LOCAL_CACHE_TTL = int(os.getenv("LOCAL_CACHE_TTL", "30"))  # seconds
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+class TierStats:
+    """Hit/miss counters for one cache tier"""
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def to_dict(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+class LocalCache:
+    """Bounded LRU cache with per-entry TTL and approximate memory accounting.
+
+    Entry size is the length of the entry's encoded payload, which is what
+    Redis stores for it, so the byte budget tracks the Redis footprint.
+    Values are returned as stored, so only immutable ones (encoded bytes,
+    strings, numbers) are put here.
+    """
+    def __init__(self, max_entries: int, max_bytes: int, ttl: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = TierStats()
+        self.evictions = 0
+        self.current_bytes = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """Return (found, value) for a key, dropping it if expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return False, None
+            expires_at, size, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.stats.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return True, value
+
+    def set(self, key: str, value, size: int, ttl: Optional[int] = None):
+        """Store a value, evicting least recently used entries to fit"""
+        if size > self.max_bytes:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self.current_bytes += size
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def to_dict(self) -> dict:
+        return {
+            **self.stats.to_dict(),
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes
+        }
+
+local_cache: Optional[LocalCache] = (
+    LocalCache(LOCAL_CACHE_MAX_ENTRIES, LOCAL_CACHE_MAX_BYTES, LOCAL_CACHE_TTL)
+    if LOCAL_CACHE_MAX_ENTRIES > 0 else None
+)
+redis_stats = TierStats()
+
+# Identifies this worker's invalidation messages so it can skip its own
+WORKER_ID = uuid.uuid4().hex
+_invalidation_thread = None
+
+def _handle_invalidation(message):
+    origin, _, key = message["data"].partition("|")
+    if origin != WORKER_ID and local_cache is not None:
+        local_cache.delete(key)
+
+def start_invalidation_listener():
+    """Subscribe this worker's local tier to cache invalidations from other workers"""
+    global _invalidation_thread
+    if local_cache is None or _invalidation_thread is not None:
+        return
+    try:
+        pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: _handle_invalidation})
+        _invalidation_thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+    except Exception as e:
+        logger.error(f"Redis invalidation listener error: {e}")
+
+def stop_invalidation_listener():
+    """Stop the invalidation listener thread"""
+    global _invalidation_thread
+    if _invalidation_thread is not None:
+        _invalidation_thread.stop()
+        _invalidation_thread = None
+
+def get_cache_stats() -> dict:
+    """Hit/miss counts for each cache tier in this worker"""
+    return {
+        "worker_id": WORKER_ID,
+        "local": local_cache.to_dict() if local_cache is not None else None,
+        "redis": redis_stats.to_dict()
+    }
+
 # Cache decorations and utilities
+NAMESPACE_VERSION_PREFIX = "cache_version:"
+# Unix time of a namespace's last generation bump (for Last-Modified headers)
+NAMESPACE_MODIFIED_PREFIX = "cache_modified:"
+# Bump the generation and stamp the change time; the stamp is kept strictly
+# increasing so two writes within one second still get distinct stamps.
+BUMP_NAMESPACE_SCRIPT = """
+local version = redis.call('INCR', KEYS[1])
+local modified = tonumber(ARGV[1])
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if modified <= previous then modified = previous + 1 end
+redis.call('SET', KEYS[2], modified)
+return version
+"""
+# Single-flight / stale-while-revalidate settings for get_or_compute
+FRESH_SUFFIX = ":fresh"
+LOCK_SUFFIX = ":lock"
+RECOMPUTE_LOCK_TTL = 10  # seconds; bounds how long a crashed recompute blocks others
+RECOMPUTE_WAIT_TIMEOUT = 5  # seconds a waiting caller polls before computing itself
+RECOMPUTE_POLL_INTERVAL = 0.05
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+# Background refreshes hold DB connections, so keep them few
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+INCREMENT_IF_EXISTS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+for i = 1, #ARGV, 2 do redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1]) end
+return 1
+"""
+
 class RedisCache:
-    def __init__(self, redis_client: redis.Redis):
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        local: Optional[LocalCache] = None,
+        binary_client: Optional[redis.Redis] = None,
+        codec=None
+    ):
         self.redis = redis_client
+        self.local = local
+        # Encoded values and compressed payloads are binary, so they are read as bytes
+        self.binary = binary_client if binary_client is not None else redis_client
+        self.codec = codec or default_codec
     
     def get(self, key: str):
-        """Get value from cache"""
+        """Get value from cache, checking the in-process tier first"""
+        # The local tier keeps the encoded value and decodes it on every hit,
+        # so callers that mutate what they get can't change the cached copy
+        if self.local is not None:
+            found, value = self.local.get(key)
+            if found:
+                return decode_value(value)
         try:
-            value = self.redis.get(key)
+            value = self.binary.get(key)
             if value:
-                return json.loads(value)
+                redis_stats.hits += 1
+                if self.local is not None:
+                    self.local.set(key, value, len(value))
+                return decode_value(value)
+            redis_stats.misses += 1
             return None
         except Exception as e:
             logger.error(f"Redis get error: {e}")
@@ -54,19 +391,148 @@ class RedisCache:
     def set(self, key: str, value, expire: int = 3600):
         """Set value in cache with expiration (default 1 hour)"""
         try:
-            serialized_value = json.dumps(value, default=str)
-            return self.redis.setex(key, expire, serialized_value)
+            serialized_value = encode_value(value, self.codec)
+            result = self.binary.setex(key, expire, serialized_value)
+            if self.local is not None:
+                # Other workers may hold the previous value
+                self._publish_invalidation(key)
+                self.local.set(key, serialized_value, len(serialized_value), expire)
+            return result
         except Exception as e:
             logger.error(f"Redis set error: {e}")
             return False
     
+    def set_bytes(self, key: str, payload: bytes, expire: int = 3600):
+        """Store a binary payload as-is"""
+        try:
+            result = self.binary.setex(key, expire, payload)
+            if self.local is not None:
+                self._publish_invalidation(key)
+                self.local.set(key, payload, len(payload), expire)
+            return result
+        except Exception as e:
+            logger.error(f"Redis set error: {e}")
+            return False
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable,
+        expire: int = 300,
+        grace: int = 60,
+        refresh: Optional[Callable] = None
+    ):
+        """Cache-aside read of a bytes payload with single-flight recomputation.
+
+        Entries are fresh for `expire` seconds and then served stale for up
+        to `grace` more while one caller, holding a short Redis lock,
+        recomputes them in the background with `refresh` (defaults to
+        `compute`; pass a callable that opens its own DB session). On a
+        cold miss only the lock holder runs `compute`; everyone else waits
+        for its result instead of hitting the database.
+        """
+        if self.local is not None:
+            found, value = self.local.get(key)
+            if found:
+                return value
+        try:
+            pipe = self.binary.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.exists(f"{key}{FRESH_SUFFIX}")
+            value, fresh = pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis get error: {e}")
+            return compute()
+
+        if value is not None:
+            redis_stats.hits += 1
+            if fresh:
+                if self.local is not None:
+                    self.local.set(key, value, len(value))
+            else:
+                token = self._acquire_lock(key)
+                if token:
+                    _refresh_executor.submit(self._refresh, key, refresh or compute, expire, grace, token)
+            return value
+
+        redis_stats.misses += 1
+        token = self._acquire_lock(key)
+        if token:
+            try:
+                return self._store(key, compute(), expire, grace)
+            finally:
+                self._release_lock(key, token)
+
+        # Another caller is computing this key; wait for its result. Once its
+        # lock is gone without a value, the fill failed (e.g. compute raised
+        # a 404) and there is nothing left to wait for.
+        deadline = time.monotonic() + RECOMPUTE_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(RECOMPUTE_POLL_INTERVAL)
+            try:
+                pipe = self.binary.pipeline(transaction=False)
+                pipe.get(key)
+                pipe.exists(f"{key}{LOCK_SUFFIX}")
+                value, locked = pipe.execute()
+            except Exception as e:
+                logger.error(f"Redis get error: {e}")
+                break
+            if value is not None:
+                if self.local is not None:
+                    self.local.set(key, value, len(value))
+                return value
+            if not locked:
+                break
+        return compute()
+
+    def _store(self, key: str, payload: bytes, expire: int, grace: int):
+        self.set_bytes(key, payload, expire=expire + grace)
+        try:
+            self.redis.setex(f"{key}{FRESH_SUFFIX}", expire, 1)
+        except Exception as e:
+            logger.error(f"Redis set error: {e}")
+        return payload
+
+    def _refresh(self, key: str, compute: Callable, expire: int, grace: int, token: str):
+        try:
+            self._store(key, compute(), expire, grace)
+        except Exception as e:
+            # Keep serving the stale value; the next stale read retries
+            logger.error(f"Cache refresh error for {key}: {e}")
+        finally:
+            self._release_lock(key, token)
+
+    def _acquire_lock(self, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            if self.redis.set(f"{key}{LOCK_SUFFIX}", token, nx=True, ex=RECOMPUTE_LOCK_TTL):
+                return token
+        except Exception as e:
+            logger.error(f"Redis lock error: {e}")
+        return None
+
+    def _release_lock(self, key: str, token: str):
+        try:
+            self.redis.eval(RELEASE_LOCK_SCRIPT, 1, f"{key}{LOCK_SUFFIX}", token)
+        except Exception as e:
+            logger.error(f"Redis unlock error: {e}")
+
     def delete(self, key: str):
         """Delete key from cache"""
+        if self.local is not None:
+            self.local.delete(key)
+            self._publish_invalidation(key)
         try:
             return self.redis.delete(key)
         except Exception as e:
             logger.error(f"Redis delete error: {e}")
             return False
+
+    def _publish_invalidation(self, key: str):
+        try:
+            self.redis.publish(INVALIDATION_CHANNEL, f"{WORKER_ID}|{key}")
+        except Exception as e:
+            logger.error(f"Redis publish error: {e}")
     
     def exists(self, key: str) -> bool:
         """Check if key exists"""
@@ -76,6 +542,111 @@ class RedisCache:
             logger.error(f"Redis exists error: {e}")
             return False
 
+    # Counter hashes (e.g. precomputed aggregates kept up to date incrementally)
+    def get_counters(self, key: str) -> Optional[dict]:
+        """Get all counters in a hash, or None if the hash does not exist"""
+        try:
+            counters = self.redis.hgetall(key)
+            return {field: int(value) for field, value in counters.items()} if counters else None
+        except Exception as e:
+            logger.error(f"Redis get counters error: {e}")
+            return None
+
+    def replace_counters(self, key: str, counters: dict, expire: int = 3600):
+        """Atomically replace a counter hash with freshly computed values"""
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.delete(key)
+            if counters:
+                pipe.hset(key, mapping=counters)
+                pipe.expire(key, expire)
+            return pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis replace counters error: {e}")
+            return False
+
+    def increment_counters(self, key: str, deltas: dict):
+        """Apply counter deltas, but only to a hash that has already been built.
+
+        Incrementing a missing hash would create a partial aggregate that
+        readers mistake for a complete one, so that case is left for the
+        next rebuild.
+        """
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return True
+        try:
+            args = [item for field, delta in deltas.items() for item in (field, delta)]
+            return bool(self.redis.eval(INCREMENT_IF_EXISTS_SCRIPT, 1, key, *args))
+        except Exception as e:
+            logger.error(f"Redis increment counters error: {e}")
+            return False
+
+    # Namespace versioning: every key in a namespace embeds the namespace's
+    # current generation, so bumping the generation orphans all of them at
+    # once. Orphaned entries are never read again and expire via their TTL.
+    def get_namespace_version(self, namespace: str) -> int:
+        """Get the current generation of a cache namespace"""
+        version_key = f"{NAMESPACE_VERSION_PREFIX}{namespace}"
+        if self.local is not None:
+            found, version = self.local.get(version_key)
+            if found:
+                return version
+        try:
+            version = self.redis.get(version_key)
+            version = int(version) if version else 0
+            if self.local is not None:
+                self.local.set(version_key, version, len(str(version)))
+            return version
+        except Exception as e:
+            logger.error(f"Redis namespace version error: {e}")
+            return 0
+
+    def namespaced_key(self, namespace: str, key: str) -> str:
+        """Build a cache key bound to the namespace's current generation"""
+        return f"{namespace}:v{self.get_namespace_version(namespace)}:{key}"
+
+    def get_namespace_state(self, namespace: str) -> Optional[Tuple[int, int]]:
+        """(generation, last-modified unix time) of a namespace, or None if Redis is unavailable.
+
+        A namespace that was never bumped is stamped with the time it was first
+        seen, so the pair identifies its contents even after Redis loses the keys.
+        """
+        modified_key = f"{NAMESPACE_MODIFIED_PREFIX}{namespace}"
+        if self.local is not None:
+            found, state = self.local.get(modified_key)
+            if found:
+                return state
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(f"{NAMESPACE_VERSION_PREFIX}{namespace}")
+            pipe.set(modified_key, int(time.time()), nx=True)
+            pipe.get(modified_key)
+            version, _, modified = pipe.execute()
+            state = (int(version or 0), int(modified))
+            if self.local is not None:
+                self.local.set(modified_key, state, 32)
+            return state
+        except Exception as e:
+            logger.error(f"Redis namespace state error: {e}")
+            return None
+
+    def invalidate_namespace(self, namespace: str):
+        """Invalidate every key in a namespace with a single generation bump"""
+        version_key = f"{NAMESPACE_VERSION_PREFIX}{namespace}"
+        modified_key = f"{NAMESPACE_MODIFIED_PREFIX}{namespace}"
+        try:
+            version = self.redis.eval(BUMP_NAMESPACE_SCRIPT, 2, version_key, modified_key, int(time.time()))
+            if self.local is not None:
+                # Workers drop their cached generation and re-read it from Redis
+                for key in (version_key, modified_key):
+                    self.local.delete(key)
+                    self._publish_invalidation(key)
+            return version
+        except Exception as e:
+            logger.error(f"Redis invalidate namespace error: {e}")
+            return False
+
 def get_cache() -> RedisCache:
     """Dependency to get Redis cache"""
-    return RedisCache(get_redis())
+    return RedisCache(get_redis(), local_cache, get_redis_binary())
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from typing import List, Dict
 from datetime import datetime, timedelta
-from database import get_db
+from database import get_read_db
 import models
 import schemas
 
@@ -15,7 +15,7 @@ router = APIRouter(
 @router.get("/{agency_id}/dashboard", response_model=Dict)
 def get_agency_dashboard(
     agency_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # Verify agency exists
     agency = db.query(models.Agency).filter(models.Agency.id == agency_id).first()
@@ -98,7 +98,7 @@ def get_agency_dashboard(
 @router.get("/{agency_id}/revenue", response_model=Dict)
 def get_agency_revenue(
     agency_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # This is a placeholder for revenue tracking
     # You'll need to implement actual revenue tracking logic based on your business model
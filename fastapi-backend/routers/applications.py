@@ -1,8 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, selectinload
-from typing import List
-from database import get_db
-from models import JobApplication, ApplicationDocument
+from typing import List, Optional
+from datetime import date
+from database import get_async_db, get_async_read_db
+from pagination import keyset_paginate_async, NEXT_CURSOR_HEADER
+from streaming_export import export_response, date_range_filter
+from conditional import conditional_get, PRIVATE_REVALIDATE, PUBLIC_REVALIDATE
+from redis_config import get_cache, RedisCache
+from routers.jobs import JOBS_CACHE_NAMESPACE
+from models import Job, JobApplication, ApplicationDocument, ApplicationStatus
 from schemas import JobApplicationCreate, JobApplication as JobApplicationSchema, JobApplicationUpdate
 from pydantic import BaseModel
 
@@ -11,13 +20,32 @@ class StatusUpdate(BaseModel):
 
 router = APIRouter()
 
+# Bumped on every application write; drives the list endpoint's ETag
+APPLICATIONS_CACHE_NAMESPACE = "applications"
+# Document types only change with a deploy. Requirements change on job edits,
+# so they are revalidated against the jobs namespace instead.
+DOCUMENT_TYPES_CACHE_CONTROL = "public, max-age=86400"
+
+async def load_application(db: AsyncSession, application_id: int) -> Optional[JobApplication]:
+    """Application with its documents loaded (lazy loads aren't possible under asyncio)"""
+    return await db.scalar(
+        select(JobApplication)
+        .options(selectinload(JobApplication.documents))
+        .where(JobApplication.id == application_id)
+        .execution_options(populate_existing=True)
+    )
+
 @router.post("/applications/", response_model=JobApplicationSchema)
-def create_application(application: JobApplicationCreate, db: Session = Depends(get_db)):
+async def create_application(
+    application: JobApplicationCreate,
+    db: AsyncSession = Depends(get_async_db),
+    cache: RedisCache = Depends(get_cache)
+):
     # Create the job application (excluding documents from the dict)
     application_data = application.dict(exclude={'documents'})
     db_application = JobApplication(**application_data)
     db.add(db_application)
-    db.flush()  # Flush to get the ID without committing
+    await db.flush()  # Flush to get the ID without committing
     
     # Create application documents
     for doc in application.documents:
@@ -29,25 +57,88 @@ def create_application(application: JobApplicationCreate, db: Session = Depends(
         )
         db.add(db_document)
     
-    db.commit()
-    db.refresh(db_application)
+    await db.commit()
+    db_application = await load_application(db, db_application.id)
+    await run_in_threadpool(cache.invalidate_namespace, APPLICATIONS_CACHE_NAMESPACE)
     return db_application
 
+APPLICATION_LIST_SORT_COLUMNS = [JobApplication.applied_date, JobApplication.id]
+
+def application_list_statement():
+    """Applications with their documents, before sorting and paging"""
+    return select(JobApplication).options(selectinload(JobApplication.documents))
+
+def application_export_query(
+    db: Session,
+    job_id: Optional[int] = None,
+    status: Optional[ApplicationStatus] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+):
+    """Matching applications with their documents, oldest first"""
+    # selectinload runs once per yield_per batch, not once per application
+    query = db.query(JobApplication).options(selectinload(JobApplication.documents))
+    if job_id is not None:
+        query = query.filter(JobApplication.job_id == job_id)
+    if status:
+        query = query.filter(JobApplication.status == status)
+    query = date_range_filter(query, JobApplication.applied_date, start, end)
+    return query.order_by(JobApplication.applied_date, JobApplication.id)
+
 @router.get("/applications/", response_model=List[JobApplicationSchema])
-def read_applications(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    applications = db.query(JobApplication).options(selectinload(JobApplication.documents)).offset(skip).limit(limit).all()
+async def read_applications(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    cache: RedisCache = Depends(get_cache)
+):
+    # Redis calls are sync; keep them off the event loop
+    not_modified, validators = await run_in_threadpool(
+        conditional_get, request, cache, APPLICATIONS_CACHE_NAMESPACE, PRIVATE_REVALIDATE, db
+    )
+    if not_modified:
+        return not_modified
+    
+    applications, next_cursor = await keyset_paginate_async(
+        db, application_list_statement(), APPLICATION_LIST_SORT_COLUMNS, limit, cursor=cursor, skip=skip
+    )
+    response.headers.update(validators)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return applications
 
+@router.get("/applications/export")
+def export_applications(
+    export_format: str = Query("ndjson", alias="format", pattern="^(csv|ndjson)$"),
+    job_id: Optional[int] = None,
+    status: Optional[ApplicationStatus] = None,
+    start: Optional[date] = Query(None, description="First application date to include"),
+    end: Optional[date] = Query(None, description="Last application date to include")
+):
+    """Stream every matching application, with its documents, as NDJSON or CSV"""
+    def build_query(db: Session):
+        return application_export_query(db, job_id, status, start, end)
+    
+    return export_response(build_query, JobApplicationSchema, export_format, "applications")
+
 @router.get("/applications/{application_id}", response_model=JobApplicationSchema)
-def read_application(application_id: int, db: Session = Depends(get_db)):
-    db_application = db.query(JobApplication).options(selectinload(JobApplication.documents)).filter(JobApplication.id == application_id).first()
+async def read_application(application_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_application = await load_application(db, application_id)
     if db_application is None:
         raise HTTPException(status_code=404, detail="Application not found")
     return db_application
 
 @router.patch("/applications/{application_id}/status", response_model=JobApplicationSchema)
-def update_application_status(application_id: int, status_update: JobApplicationUpdate, db: Session = Depends(get_db)):
-    db_application = db.query(JobApplication).filter(JobApplication.id == application_id).first()
+async def update_application_status(
+    application_id: int,
+    status_update: JobApplicationUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    cache: RedisCache = Depends(get_cache)
+):
+    db_application = await load_application(db, application_id)
     if db_application is None:
         raise HTTPException(status_code=404, detail="Application not found")
     
@@ -58,26 +149,41 @@ def update_application_status(application_id: int, status_update: JobApplication
     
     # Update status
     db_application.status = status_update.status
-    db.commit()
-    db.refresh(db_application)
+    await db.commit()
+    await run_in_threadpool(cache.invalidate_namespace, APPLICATIONS_CACHE_NAMESPACE)
     return db_application
 
 @router.get("/jobs/{job_id}/document-requirements")
-def get_job_document_requirements(job_id: int, db: Session = Depends(get_db)):
+async def get_job_document_requirements(
+    job_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    cache: RedisCache = Depends(get_cache)
+):
     """Get the required documents for a specific job"""
-    from models import Job
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.get(Job, job_id)
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    # Every job write, PATCH document-requirements included, bumps the jobs
+    # namespace, so an applicant's copy is revalidated (304) rather than reused
+    not_modified, validators = await run_in_threadpool(
+        conditional_get, request, cache, JOBS_CACHE_NAMESPACE, PUBLIC_REVALIDATE
+    )
+    if not_modified:
+        return not_modified
+    
     # Return the required documents or default to just CV
     required_docs = job.required_documents if job.required_documents else ["cv"]
+    response.headers.update(validators)
     return {"job_id": job_id, "required_documents": required_docs}
 
 @router.get("/document-types")
-def get_available_document_types():
+def get_available_document_types(response: Response):
     """Get all available document types that can be uploaded"""
     from models import DocumentType
+    response.headers["Cache-Control"] = DOCUMENT_TYPES_CACHE_CONTROL
     return {
         "document_types": [
             {"value": doc_type.value, "label": doc_type.value.replace("_", " ").title()}
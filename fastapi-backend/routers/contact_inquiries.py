@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from database import get_db
+from database import get_async_db, get_async_read_db
+from pagination import keyset_paginate_async, NEXT_CURSOR_HEADER
+from streaming_export import export_response, date_range_filter
+from conditional import conditional_get, PRIVATE_REVALIDATE
+from redis_config import get_cache, RedisCache
 import models
 import schemas
-from datetime import datetime
+from datetime import date, datetime
 from phone_utils import normalize_kenyan_phone
 
 router = APIRouter(
@@ -12,10 +19,14 @@ router = APIRouter(
     tags=["contact-inquiries"]
 )
 
+# Bumped on every inquiry write; drives the list endpoint's ETag
+CONTACT_INQUIRIES_CACHE_NAMESPACE = "contact_inquiries"
+
 @router.post("/", response_model=schemas.ContactInquiry, status_code=status.HTTP_201_CREATED)
-def create_contact_inquiry(
+async def create_contact_inquiry(
     inquiry: schemas.ContactInquiryCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    cache: RedisCache = Depends(get_cache)
 ):
     """Create a new contact inquiry from the contact form."""
     # Normalize phone number if provided
@@ -40,34 +51,81 @@ def create_contact_inquiry(
     )
     
     db.add(db_inquiry)
-    db.commit()
-    db.refresh(db_inquiry)
+    await db.commit()
+    await db.refresh(db_inquiry)
+    await run_in_threadpool(cache.invalidate_namespace, CONTACT_INQUIRIES_CACHE_NAMESPACE)
     
     return db_inquiry
 
+CONTACT_INQUIRY_LIST_SORT_COLUMNS = [models.ContactInquiry.created_at, models.ContactInquiry.id]
+
+def contact_inquiry_list_statement(is_read: Optional[bool] = None):
+    """Filtered contact inquiries for the list endpoint, before sorting and paging"""
+    query = select(models.ContactInquiry)
+    if is_read is not None:
+        query = query.filter(models.ContactInquiry.is_read == is_read)
+    return query
+
 @router.get("/", response_model=List[schemas.ContactInquiry])
-def get_contact_inquiries(
+async def get_contact_inquiries(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     is_read: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db),
+    cache: RedisCache = Depends(get_cache)
 ):
-    """Get all contact inquiries with optional filtering by read status."""
-    query = db.query(models.ContactInquiry)
-    
-    if is_read is not None:
-        query = query.filter(models.ContactInquiry.is_read == is_read)
+    """Get all contact inquiries with optional filtering by read status.
+
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the
+    next page without an offset scan.
+    """
+    # Redis calls are sync; keep them off the event loop
+    not_modified, validators = await run_in_threadpool(
+        conditional_get, request, cache, CONTACT_INQUIRIES_CACHE_NAMESPACE, PRIVATE_REVALIDATE, db
+    )
+    if not_modified:
+        return not_modified
     
-    inquiries = query.order_by(models.ContactInquiry.created_at.desc()).offset(skip).limit(limit).all()
+    inquiries, next_cursor = await keyset_paginate_async(
+        db,
+        contact_inquiry_list_statement(is_read),
+        CONTACT_INQUIRY_LIST_SORT_COLUMNS,
+        limit,
+        cursor=cursor,
+        skip=skip
+    )
+    response.headers.update(validators)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return inquiries
 
+@router.get("/export")
+def export_contact_inquiries(
+    export_format: str = Query("ndjson", alias="format", pattern="^(csv|ndjson)$"),
+    is_read: Optional[bool] = Query(None, description="Filter by read status"),
+    start: Optional[date] = Query(None, description="First creation date to include"),
+    end: Optional[date] = Query(None, description="Last creation date to include")
+):
+    """Stream every matching contact inquiry as NDJSON or CSV, oldest first."""
+    def build_query(db: Session):
+        query = db.query(models.ContactInquiry)
+        if is_read is not None:
+            query = query.filter(models.ContactInquiry.is_read == is_read)
+        query = date_range_filter(query, models.ContactInquiry.created_at, start, end)
+        return query.order_by(models.ContactInquiry.created_at, models.ContactInquiry.id)
+    
+    return export_response(build_query, schemas.ContactInquiry, export_format, "contact-inquiries")
+
 @router.get("/{inquiry_id}", response_model=schemas.ContactInquiry)
-def get_contact_inquiry(
+async def get_contact_inquiry(
     inquiry_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific contact inquiry by ID."""
-    inquiry = db.query(models.ContactInquiry).filter(models.ContactInquiry.id == inquiry_id).first()
+    inquiry = await db.get(models.ContactInquiry, inquiry_id)
     if inquiry is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -76,13 +134,14 @@ def get_contact_inquiry(
     return inquiry
 
 @router.put("/{inquiry_id}", response_model=schemas.ContactInquiry)
-def update_contact_inquiry(
+async def update_contact_inquiry(
     inquiry_id: int,
     inquiry_update: schemas.ContactInquiryUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    cache: RedisCache = Depends(get_cache)
 ):
     """Update a contact inquiry (for admin use - mark as read, add response)."""
-    inquiry = db.query(models.ContactInquiry).filter(models.ContactInquiry.id == inquiry_id).first()
+    inquiry = await db.get(models.ContactInquiry, inquiry_id)
     if inquiry is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -97,25 +156,28 @@ def update_contact_inquiry(
         inquiry.response = inquiry_update.response
         inquiry.responded_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(inquiry)
+    await db.commit()
+    await db.refresh(inquiry)
+    await run_in_threadpool(cache.invalidate_namespace, CONTACT_INQUIRIES_CACHE_NAMESPACE)
     
     return inquiry
 
 @router.delete("/{inquiry_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_contact_inquiry(
+async def delete_contact_inquiry(
     inquiry_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    cache: RedisCache = Depends(get_cache)
 ):
     """Delete a contact inquiry."""
-    inquiry = db.query(models.ContactInquiry).filter(models.ContactInquiry.id == inquiry_id).first()
+    inquiry = await db.get(models.ContactInquiry, inquiry_id)
     if inquiry is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Contact inquiry not found"
         )
     
-    db.delete(inquiry)
-    db.commit()
+    await db.delete(inquiry)
+    await db.commit()
+    await run_in_threadpool(cache.invalidate_namespace, CONTACT_INQUIRIES_CACHE_NAMESPACE)
     
     return None
@@ -1,24 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, func, select, update
 from typing import List, Optional
-from database import get_db
+from database import get_async_db, get_async_read_db
+from pagination import keyset_paginate_async, NEXT_CURSOR_HEADER
+from streaming_export import export_response, date_range_filter
+from conditional import conditional_get, PRIVATE_REVALIDATE
+from redis_config import get_cache, RedisCache
 import models
 import schemas
-from datetime import datetime
+from datetime import date, datetime
 
 router = APIRouter(
     prefix="/employer-inquiries",
     tags=["employer-inquiries"]
 )
 
+# Bumped on every inquiry write; drives the list endpoint's ETag
+EMPLOYER_INQUIRIES_CACHE_NAMESPACE = "employer_inquiries"
+
 @router.post("/", response_model=schemas.EmployerInquiry, status_code=status.HTTP_201_CREATED)
-def create_employer_inquiry(
+async def create_employer_inquiry(
     inquiry: schemas.EmployerInquiryCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    cache: RedisCache = Depends(get_cache)
 ):
     # Verify agency exists
-    agency = db.query(models.Agency).filter(models.Agency.id == inquiry.agency_id).first()
+    agency = await db.get(models.Agency, inquiry.agency_id)
     if not agency:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -35,22 +45,27 @@ def create_employer_inquiry(
     )
     
     db.add(db_inquiry)
-    db.commit()
-    db.refresh(db_inquiry)
+    await db.commit()
+    await db.refresh(db_inquiry)
+    await run_in_threadpool(cache.invalidate_namespace, EMPLOYER_INQUIRIES_CACHE_NAMESPACE)
     
     return db_inquiry
 
-@router.get("/", response_model=List[schemas.EmployerInquiry])
-def get_employer_inquiries(
-    skip: int = 0,
-    limit: int = 100,
-    status: Optional[str] = Query(None, description="Filter by status"),
-    priority: Optional[str] = Query(None, description="Filter by priority"),
-    search: Optional[str] = Query(None, description="Search in employer name, email, or message"),
-    assigned_to: Optional[str] = Query(None, description="Filter by assigned admin"),
-    db: Session = Depends(get_db)
+# Order by priority and created date (id breaks ties for stable cursors)
+INQUIRY_LIST_SORT_COLUMNS = [
+    models.EmployerInquiry.priority,
+    models.EmployerInquiry.created_at,
+    models.EmployerInquiry.id
+]
+
+def inquiry_list_statement(
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    search: Optional[str] = None,
+    assigned_to: Optional[str] = None
 ):
-    query = db.query(models.EmployerInquiry)
+    """Filtered inquiries for the list endpoint, before sorting and paging"""
+    query = select(models.EmployerInquiry)
     
     # Apply filters
     if status:
@@ -66,22 +81,68 @@ def get_employer_inquiries(
             models.EmployerInquiry.message.ilike(f"%{search}%")
         )
         query = query.filter(search_filter)
-    
-    # Order by priority and created date
-    query = query.order_by(
-        models.EmployerInquiry.priority.desc(),
-        models.EmployerInquiry.created_at.desc()
+    return query
+
+@router.get("/", response_model=List[schemas.EmployerInquiry])
+async def get_employer_inquiries(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    priority: Optional[str] = Query(None, description="Filter by priority"),
+    search: Optional[str] = Query(None, description="Search in employer name, email, or message"),
+    assigned_to: Optional[str] = Query(None, description="Filter by assigned admin"),
+    db: AsyncSession = Depends(get_async_read_db),
+    cache: RedisCache = Depends(get_cache)
+):
+    # Redis calls are sync; keep them off the event loop
+    not_modified, validators = await run_in_threadpool(
+        conditional_get, request, cache, EMPLOYER_INQUIRIES_CACHE_NAMESPACE, PRIVATE_REVALIDATE, db
     )
+    if not_modified:
+        return not_modified
     
-    inquiries = query.offset(skip).limit(limit).all()
+    inquiries, next_cursor = await keyset_paginate_async(
+        db,
+        inquiry_list_statement(status, priority, search, assigned_to),
+        INQUIRY_LIST_SORT_COLUMNS,
+        limit,
+        cursor=cursor,
+        skip=skip
+    )
+    response.headers.update(validators)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return inquiries
 
+@router.get("/export")
+def export_employer_inquiries(
+    export_format: str = Query("ndjson", alias="format", pattern="^(csv|ndjson)$"),
+    status: Optional[models.InquiryStatus] = Query(None, description="Filter by status"),
+    priority: Optional[models.Priority] = Query(None, description="Filter by priority"),
+    start: Optional[date] = Query(None, description="First creation date to include"),
+    end: Optional[date] = Query(None, description="Last creation date to include")
+):
+    """Stream every matching employer inquiry as NDJSON or CSV, oldest first."""
+    def build_query(db: Session):
+        query = db.query(models.EmployerInquiry)
+        if status:
+            query = query.filter(models.EmployerInquiry.status == status)
+        if priority:
+            query = query.filter(models.EmployerInquiry.priority == priority)
+        query = date_range_filter(query, models.EmployerInquiry.created_at, start, end)
+        return query.order_by(models.EmployerInquiry.created_at, models.EmployerInquiry.id)
+    
+    return export_response(build_query, schemas.EmployerInquiry, export_format, "employer-inquiries")
+
 @router.get("/{inquiry_id}", response_model=schemas.EmployerInquiry)
-def get_employer_inquiry(
+async def get_employer_inquiry(
     inquiry_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    inquiry = db.query(models.EmployerInquiry).filter(models.EmployerInquiry.id == inquiry_id).first()
+    inquiry = await db.get(models.EmployerInquiry, inquiry_id)
     if inquiry is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -90,12 +151,13 @@ def get_employer_inquiry(
     return inquiry
 
 @router.put("/{inquiry_id}", response_model=schemas.EmployerInquiry)
-def update_employer_inquiry(
+async def update_employer_inquiry(
     inquiry_id: int,
     inquiry_update: schemas.EmployerInquiryUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    cache: RedisCache = Depends(get_cache)
 ):
-    inquiry = db.query(models.EmployerInquiry).filter(models.EmployerInquiry.id == inquiry_id).first()
+    inquiry = await db.get(models.EmployerInquiry, inquiry_id)
     if inquiry is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -117,33 +179,39 @@ def update_employer_inquiry(
     for field, value in update_data.items():
         setattr(inquiry, field, value)
     
-    db.commit()
-    db.refresh(inquiry)
+    await db.commit()
+    await db.refresh(inquiry)
+    await run_in_threadpool(cache.invalidate_namespace, EMPLOYER_INQUIRIES_CACHE_NAMESPACE)
     return inquiry
 
 @router.delete("/{inquiry_id}")
-def delete_employer_inquiry(
+async def delete_employer_inquiry(
     inquiry_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    cache: RedisCache = Depends(get_cache)
 ):
-    inquiry = db.query(models.EmployerInquiry).filter(models.EmployerInquiry.id == inquiry_id).first()
+    inquiry = await db.get(models.EmployerInquiry, inquiry_id)
     if inquiry is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Inquiry not found"
         )
     
-    db.delete(inquiry)
-    db.commit()
+    await db.delete(inquiry)
+    await db.commit()
+    await run_in_threadpool(cache.invalidate_namespace, EMPLOYER_INQUIRIES_CACHE_NAMESPACE)
     return {"message": "Inquiry deleted successfully"}
 
 @router.post("/bulk-update")
-def bulk_update_inquiries(
+async def bulk_update_inquiries(
     inquiry_ids: List[int],
     update_data: schemas.EmployerInquiryUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    cache: RedisCache = Depends(get_cache)
 ):
-    inquiries = db.query(models.EmployerInquiry).filter(models.EmployerInquiry.id.in_(inquiry_ids)).all()
+    inquiries = (await db.scalars(
+        select(models.EmployerInquiry.id).where(models.EmployerInquiry.id.in_(inquiry_ids))
+    )).all()
     
     if not inquiries:
         raise HTTPException(
@@ -155,26 +223,38 @@ def bulk_update_inquiries(
     update_dict["updated_at"] = datetime.utcnow()
     
     # Apply bulk update
-    db.query(models.EmployerInquiry).filter(models.EmployerInquiry.id.in_(inquiry_ids)).update(
-        update_dict, synchronize_session=False
+    await db.execute(
+        update(models.EmployerInquiry)
+        .where(models.EmployerInquiry.id.in_(inquiry_ids))
+        .values(update_dict)
+        .execution_options(synchronize_session=False)
     )
     
-    db.commit()
+    await db.commit()
+    await run_in_threadpool(cache.invalidate_namespace, EMPLOYER_INQUIRIES_CACHE_NAMESPACE)
     return {"message": f"Updated {len(inquiries)} inquiries", "updated_count": len(inquiries)}
 
+def inquiry_stats_statement():
+    """Summary counts for /stats/summary"""
+    # One pass over the table instead of a COUNT query per figure
+    inquiry = models.EmployerInquiry
+    return select(
+        func.count().label("total"),
+        func.count().filter(inquiry.status == models.InquiryStatus.NEW).label("new"),
+        func.count().filter(inquiry.status == models.InquiryStatus.IN_PROGRESS).label("in_progress"),
+        func.count().filter(inquiry.status == models.InquiryStatus.RESOLVED).label("resolved"),
+        func.count().filter(inquiry.priority == models.Priority.URGENT).label("urgent"),
+    ).select_from(inquiry)
+
 @router.get("/stats/summary")
-def get_inquiry_stats(db: Session = Depends(get_db)):
+async def get_inquiry_stats(db: AsyncSession = Depends(get_async_read_db)):
     """Get summary statistics for inquiries"""
-    total = db.query(models.EmployerInquiry).count()
-    new = db.query(models.EmployerInquiry).filter(models.EmployerInquiry.status == "new").count()
-    in_progress = db.query(models.EmployerInquiry).filter(models.EmployerInquiry.status == "in_progress").count()
-    resolved = db.query(models.EmployerInquiry).filter(models.EmployerInquiry.status == "resolved").count()
-    urgent = db.query(models.EmployerInquiry).filter(models.EmployerInquiry.priority == "urgent").count()
+    row = (await db.execute(inquiry_stats_statement())).one()
     
     return {
-        "total": total,
-        "new": new,
-        "in_progress": in_progress,
-        "resolved": resolved,
-        "urgent": urgent
+        "total": row.total,
+        "new": row.new,
+        "in_progress": row.in_progress,
+        "resolved": row.resolved,
+        "urgent": row.urgent
     } 
\ No newline at end of file
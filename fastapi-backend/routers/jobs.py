@@ -1,14 +1,115 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
-from models import Job
-from schemas import JobCreate, Job as JobSchema
-from redis_config import get_cache, RedisCache
+from fastapi import APIRouter, Depends, HTTPException, Response, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import func, literal, select, union_all
+from typing import List, Optional, Union
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_read_db, get_async_read_db, pin_to_primary, run_in_new_session
+from models import Job, JobType, JobStatus, JobViewDaily, JOB_SEARCH_CONFIG
+from schemas import JobCreate, Job as JobSchema, JobCard, JobCardListWithFacets, JobSearchResult, JobSuggestions, JobListWithFacets, JobViewDay, JobImportResult, JobAlertCampaignCreate, JobAlertCampaign
+from redis_config import get_cache, get_redis, RedisCache
+from pagination import keyset_paginate, NEXT_CURSOR_HEADER
+from conditional import conditional_get, pin_recent_writes
+from compression import compress_payload, precompressed_response
+from job_views import top_jobs, view_totals, flushed_views, known_job_ids, view_buffer, add_known_job_ids, remove_known_job_ids, forget_job_views, ALL_TIME
+from job_facets import get_job_facets, job_facet_members, update_job_facets, reset_job_facets, facet_summary
+from job_import import import_jobs as import_job_rows, import_format
+from streaming_export import export_response, date_range_filter
+from cache_warmer import cache_warmer, record_search
+from job_alerts import job_alert_content, start_campaign, campaign_stats, iter_segment, SEGMENTS
+from datetime import date, datetime, timedelta
+import anyio
+import hashlib
 import json
 
 router = APIRouter()
 
+# Listing pages and search results share one namespace so a single
+# generation bump invalidates every page/query variant.
+JOBS_CACHE_NAMESPACE = "jobs"
+# Seconds an expired entry may still be served while it is being recomputed
+CACHE_GRACE_PERIOD = 60
+
+def invalidate_job_caches(cache: RedisCache, job_id: Optional[int] = None):
+    """Drop cached listings/searches and, optionally, a single job's detail"""
+    if job_id is not None:
+        cache.delete(f"job:{job_id}")
+    cache.invalidate_namespace(JOBS_CACHE_NAMESPACE)
+
+# Cached read responses are stored as the final JSON body produced by the
+# JobSchema serializer, so a hit skips decoding and response_model validation.
+job_list_adapter = TypeAdapter(List[JobSchema])
+
+def serialize_jobs(jobs) -> bytes:
+    """Encode Job rows exactly as response_model=List[JobSchema] would"""
+    return job_list_adapter.dump_json(job_list_adapter.validate_python(jobs, from_attributes=True))
+
+# Columns behind JobCard; the rest (description, requirements, ...) stay deferred
+JOB_CARD_COLUMNS = (Job.title, Job.company, Job.location, Job.type, Job.salary, Job.posted_date)
+job_card_list_adapter = TypeAdapter(List[JobCard])
+
+def serialize_job_cards(jobs) -> bytes:
+    """Encode Job rows loaded with JOB_CARD_COLUMNS as List[JobCard]"""
+    return job_card_list_adapter.dump_json(job_card_list_adapter.validate_python(jobs, from_attributes=True))
+
+search_result_adapter = TypeAdapter(List[JobSearchResult])
+
+def serialize_search_results(rows) -> bytes:
+    """Encode (job, rank, snippet) rows as List[JobSearchResult]"""
+    results = [
+        {**JobSchema.model_validate(job).model_dump(), "rank": rank, "snippet": snippet}
+        for job, rank, snippet in rows
+    ]
+    return search_result_adapter.dump_json(search_result_adapter.validate_python(results))
+
+def serialize_job(job) -> bytes:
+    """Encode a Job row exactly as response_model=JobSchema would"""
+    return JobSchema.model_validate(job).model_dump_json().encode()
+
+def cached_payload(cache: RedisCache, cache_key: str, build, db: Session, expire: int, pack=compress_payload):
+    """Read a raw JSON payload through the single-flight, stale-while-revalidate cache.
+
+    `build(db)` produces the payload: with the request's session on a miss,
+    or with a fresh session when a stale entry is refreshed in the background.
+    `pack` turns it into the stored bytes; by default large payloads are
+    stored gzipped, so they are compressed once per fill.
+    """
+    compressed_build = lambda db: pack(build(db))
+    return cache.get_or_compute(
+        cache_key,
+        lambda: compressed_build(db),
+        expire=expire,
+        grace=CACHE_GRACE_PERIOD,
+        refresh=run_in_new_session(compressed_build)
+    )
+
+# A listing page is cached together with the cursor of the page after it, as
+# <cursor>\n<payload>, so every tier and the background refresh serve the two
+# from one value (cursors are URL-safe base64 and never contain a newline)
+PAGE_CURSOR_SEPARATOR = b"\n"
+
+def pack_page(page) -> bytes:
+    payload, next_cursor = page
+    return (next_cursor or "").encode() + PAGE_CURSOR_SEPARATOR + compress_payload(payload)
+
+def unpack_page(value: bytes):
+    """(payload, next cursor or None) of a value stored by pack_page"""
+    next_cursor, _, payload = value.partition(PAGE_CURSOR_SEPARATOR)
+    return payload, next_cursor.decode() or None
+
+def json_response(
+    payload,
+    next_cursor: Optional[str] = None,
+    headers: Optional[dict] = None,
+    accept_encoding: Optional[str] = None
+) -> Response:
+    """Response for a (possibly precompressed) cached JSON payload"""
+    response = precompressed_response(payload, accept_encoding, headers=headers)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
 @router.post("/jobs/", response_model=JobSchema)
 def create_job(job: JobCreate, db: Session = Depends(get_db), cache: RedisCache = Depends(get_cache)):
     # Convert the Pydantic model to a dict and create the database model
@@ -19,53 +120,242 @@ def create_job(job: JobCreate, db: Session = Depends(get_db), cache: RedisCache
     db.refresh(db_job)
     
     # Clear jobs cache when new job is created
-    cache.delete("jobs:all")
-    cache.delete(f"jobs:search:*")  # Clear search caches
+    invalidate_job_caches(cache)
+    add_known_job_ids(get_redis(), [db_job.id])
+    update_job_facets(cache, None, job_facet_members(db_job))
+    cache_warmer.request()
     
     return db_job
 
-@router.get("/jobs/", response_model=List[JobSchema])
-def read_jobs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), cache: RedisCache = Depends(get_cache)):
-    # Create cache key
-    cache_key = f"jobs:all:{skip}:{limit}"
-    
-    # Try to get from cache first
-    cached_jobs = cache.get(cache_key)
-    if cached_jobs:
-        return cached_jobs
-    
-    # If not in cache, query database
-    jobs = db.query(Job).offset(skip).limit(limit).all()
-    
-    # Convert to dict for caching
-    jobs_data = [job.__dict__ for job in jobs]
-    for job_data in jobs_data:
-        job_data.pop('_sa_instance_state', None)  # Remove SQLAlchemy state
+@router.post("/jobs/import", response_model=JobImportResult)
+async def import_jobs(
+    request: Request,
+    source_format: Optional[str] = Query(
+        None, alias="format", pattern="^(csv|ndjson)$", description="Overrides the Content-Type"
+    ),
+    db: Session = Depends(get_db),
+    cache: RedisCache = Depends(get_cache)
+):
+    """Bulk-create jobs from a CSV or NDJSON request body, streamed in batches"""
+    fmt = source_format or import_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson"
+        )
+    
+    body = request.stream()
+    def read_body():
+        # Runs on the worker thread; pulls the next chunk from the event loop
+        while True:
+            try:
+                yield anyio.from_thread.run(body.__anext__)
+            except StopAsyncIteration:
+                return
+    
+    def on_imported(job_ids):
+        # Each batch's jobs can be viewed as soon as it commits
+        add_known_job_ids(get_redis(), job_ids)
+    
+    report = await run_in_threadpool(import_job_rows, db, read_body(), fmt, on_imported)
+    
+    # One invalidation for the whole import instead of one per row
+    if report["imported"]:
+        invalidate_job_caches(cache)
+        reset_job_facets(cache)
+        cache_warmer.request()
+    
+    return report
+
+@router.get("/jobs/export")
+def export_jobs(
+    export_format: str = Query("ndjson", alias="format", pattern="^(csv|ndjson)$"),
+    job_type: Optional[JobType] = Query(None, alias="type"),
+    status: Optional[JobStatus] = None,
+    start: Optional[date] = Query(None, description="First posted date to include"),
+    end: Optional[date] = Query(None, description="Last posted date to include")
+):
+    """Stream every matching job as NDJSON or CSV, oldest first"""
+    def build_query(db: Session):
+        query = db.query(Job)
+        if job_type:
+            query = query.filter(Job.type == job_type)
+        if status:
+            query = query.filter(Job.status == status)
+        query = date_range_filter(query, Job.posted_date, start, end)
+        return query.order_by(Job.posted_date, Job.id)
+    
+    return export_response(build_query, JobSchema, export_format, "jobs")
+
+@router.get("/jobs/", response_model=Union[List[JobSchema], JobListWithFacets, List[JobCard], JobCardListWithFacets])
+def read_jobs(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    job_type: Optional[JobType] = Query(None, alias="type"),
+    status: Optional[JobStatus] = None,
+    location: Optional[str] = None,
+    passport_required: Optional[bool] = None,
+    facets: bool = Query(False, description="Wrap the page as {jobs, facets} with facet counts"),
+    compact: bool = Query(False, description="Return JobCard items (list card fields only)"),
+    db: Session = Depends(get_read_db),
+    cache: RedisCache = Depends(get_cache)
+):
+    # Answer revalidations from the namespace's change state alone
+    not_modified, validators = conditional_get(request, cache, JOBS_CACHE_NAMESPACE, db=db)
+    if not_modified:
+        return not_modified
+    
+    payload, next_cursor = cached_job_list(
+        cache, db, skip, limit, cursor, job_type, status, location, passport_required, facets, compact
+    )
+    return json_response(payload, next_cursor, validators, request.headers.get("accept-encoding"))
+
+# Each filter has a composite index ending in these columns (see models.Job)
+JOB_LIST_SORT_COLUMNS = [Job.posted_date, Job.id]
+
+def job_list_query(
+    db: Session,
+    job_type: Optional[JobType] = None,
+    status: Optional[JobStatus] = None,
+    location: Optional[str] = None,
+    passport_required: Optional[bool] = None,
+    compact: bool = False
+):
+    """Filtered jobs query for the listing, before sorting and paging"""
+    query = db.query(Job)
+    if compact:
+        query = query.options(load_only(*JOB_CARD_COLUMNS))
+    if job_type is not None:
+        query = query.filter(Job.type == job_type)
+    if status is not None:
+        query = query.filter(Job.status == status)
+    if location is not None:
+        query = query.filter(Job.location == location)
+    if passport_required is not None:
+        query = query.filter(Job.passport_required == passport_required)
+    return query
+
+def cached_job_list(
+    cache: RedisCache,
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    job_type: Optional[JobType] = None,
+    status: Optional[JobStatus] = None,
+    location: Optional[str] = None,
+    passport_required: Optional[bool] = None,
+    facets: bool = False,
+    compact: bool = False
+):
+    """Cached listing page payload and the cursor of the page after it"""
+    # Create cache key (compact pages are cached apart from full ones)
+    page_key = f"cursor:{cursor}:{limit}" if cursor else f"{skip}:{limit}"
+    filter_key = facet_summary([job_type, status, location, passport_required])
+    view = "cards" if compact else "all"
+    cache_key = cache.namespaced_key(
+        JOBS_CACHE_NAMESPACE, f"page:{view}:{filter_key}:{page_key}:{int(facets)}"
+    )
+    
+    def build(db: Session):
+        # Query database (newest first, keyset-paginated)
+        query = job_list_query(db, job_type, status, location, passport_required, compact)
+        jobs, next_cursor = keyset_paginate(query, JOB_LIST_SORT_COLUMNS, limit, cursor=cursor, skip=skip)
+        payload = serialize_job_cards(jobs) if compact else serialize_jobs(jobs)
+        if facets:
+            # Facet counts come from the incrementally maintained aggregate
+            payload = b'{"jobs":' + payload + b',"facets":' + json.dumps(get_job_facets(db, cache)).encode() + b'}'
+        return payload, next_cursor
     
     # Cache for 5 minutes
-    cache.set(cache_key, jobs_data, expire=300)
-    
-    return jobs
+    return unpack_page(cached_payload(cache, cache_key, build, db, expire=300, pack=pack_page))
+
+# Autocomplete over titles, companies and locations. Served by the pg_trgm GIN
+# indexes from the add_job_suggest_trgm migration, which Postgres maintains
+# row by row as jobs are created, updated and deleted.
+SUGGEST_FIELDS = ("title", "company", "location")
+# Lower than pg_trgm's 0.6 default so transpositions like "secuirty" still match
+SUGGEST_SIMILARITY_THRESHOLD = "0.4"
+
+@router.get("/jobs/suggest", response_model=JobSuggestions)
+def suggest_jobs(
+    request: Request,
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+    db: Session = Depends(get_read_db),
+    cache: RedisCache = Depends(get_cache)
+):
+    """Typo-tolerant suggestions for the job search box"""
+    prefix = prefix.strip().lower()
+    pin_recent_writes(db, cache, JOBS_CACHE_NAMESPACE)
+    cache_key = cache.namespaced_key(JOBS_CACHE_NAMESPACE, f"suggest:{prefix}:{limit}")
+
+    def build(db: Session):
+        # Applies to this transaction only; the `<%` operator below honours it
+        db.execute(select(func.set_config("pg_trgm.word_similarity_threshold", SUGGEST_SIMILARITY_THRESHOLD, True)))
+
+        candidates = union_all(*[
+            select(
+                getattr(Job, field).label("text"),
+                literal(field).label("field"),
+                func.word_similarity(prefix, getattr(Job, field)).label("score")
+            ).where(literal(prefix).op("<%")(getattr(Job, field)))
+            for field in SUGGEST_FIELDS
+        ]).subquery()
+        score = func.max(candidates.c.score).label("score")
+        rows = db.execute(
+            select(candidates.c.text, candidates.c.field, score)
+            .group_by(candidates.c.text, candidates.c.field)
+            .order_by(score.desc(), func.length(candidates.c.text))
+            .limit(limit)
+        ).all()
+
+        return JobSuggestions(
+            prefix=prefix,
+            suggestions=[{"text": row.text, "field": row.field, "score": row.score} for row in rows]
+        ).model_dump_json()
+
+    return json_response(
+        cached_payload(cache, cache_key, build, db, expire=300),
+        accept_encoding=request.headers.get("accept-encoding")
+    )
 
 @router.get("/jobs/{job_id}", response_model=JobSchema)
-def read_job(job_id: int, db: Session = Depends(get_db), cache: RedisCache = Depends(get_cache)):
-    # Try cache first
+def read_job(job_id: int, request: Request, db: Session = Depends(get_read_db), cache: RedisCache = Depends(get_cache)):
+    # Any job write bumps the namespace, so this also covers a single job
+    not_modified, validators = conditional_get(
+        request, cache, JOBS_CACHE_NAMESPACE, db=db, exists=lambda: job_exists(cache, db, job_id)
+    )
+    if not_modified:
+        return not_modified
+    
+    return json_response(
+        cached_job_detail(cache, db, job_id),
+        headers=validators,
+        accept_encoding=request.headers.get("accept-encoding")
+    )
+
+def job_exists(cache: RedisCache, db: Session, job_id: int) -> bool:
+    """Whether a job exists; a cached detail entry answers without a query"""
+    # Deleting a job drops its detail entry
+    if cache.exists(f"job:{job_id}"):
+        return True
+    return db.query(Job.id).filter(Job.id == job_id).first() is not None
+
+def cached_job_detail(cache: RedisCache, db: Session, job_id: int):
+    """Cached detail payload for one job (404 if it doesn't exist)"""
     cache_key = f"job:{job_id}"
-    cached_job = cache.get(cache_key)
-    if cached_job:
-        return cached_job
     
-    # Query database
-    db_job = db.query(Job).filter(Job.id == job_id).first()
-    if db_job is None:
-        raise HTTPException(status_code=404, detail="Job not found")
+    def build(db: Session):
+        db_job = db.query(Job).filter(Job.id == job_id).first()
+        if db_job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return serialize_job(db_job)
     
     # Cache the job for 10 minutes
-    job_data = db_job.__dict__.copy()
-    job_data.pop('_sa_instance_state', None)
-    cache.set(cache_key, job_data, expire=600)
-    
-    return db_job
+    return cached_payload(cache, cache_key, build, db, expire=600)
 
 @router.put("/jobs/{job_id}", response_model=JobSchema)
 def update_job(job_id: int, job: JobCreate, db: Session = Depends(get_db), cache: RedisCache = Depends(get_cache)):
@@ -73,6 +363,7 @@ def update_job(job_id: int, job: JobCreate, db: Session = Depends(get_db), cache
     if db_job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    facets_before = job_facet_members(db_job)
     job_data = job.dict()
     for key, value in job_data.items():
         setattr(db_job, key, value)
@@ -81,8 +372,9 @@ def update_job(job_id: int, job: JobCreate, db: Session = Depends(get_db), cache
     db.refresh(db_job)
     
     # Clear caches
-    cache.delete(f"job:{job_id}")
-    cache.delete("jobs:all")
+    invalidate_job_caches(cache, job_id)
+    update_job_facets(cache, facets_before, job_facet_members(db_job))
+    cache_warmer.request()
     
     return db_job
 
@@ -92,43 +384,68 @@ def delete_job(job_id: int, db: Session = Depends(get_db), cache: RedisCache = D
     if db_job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    facets_before = job_facet_members(db_job)
     db.delete(db_job)
     db.commit()
     
     # Clear caches
-    cache.delete(f"job:{job_id}")
-    cache.delete("jobs:all")
+    invalidate_job_caches(cache, job_id)
+    update_job_facets(cache, facets_before, None)
+    remove_known_job_ids(get_redis(), [job_id])
+    forget_job_views(get_redis(), job_id)
+    cache_warmer.request()
     
     return {"message": "Job deleted successfully"}
 
-# New endpoint for job search with caching
-@router.get("/jobs/search/{query}", response_model=List[JobSchema])
-def search_jobs(query: str, db: Session = Depends(get_db), cache: RedisCache = Depends(get_cache)):
-    cache_key = f"jobs:search:{query.lower()}"
-    
-    # Try cache first
-    cached_results = cache.get(cache_key)
-    if cached_results:
-        return cached_results
-    
-    # Search database
-    jobs = db.query(Job).filter(
-        Job.title.ilike(f"%{query}%") | 
-        Job.description.ilike(f"%{query}%") |
-        Job.location.ilike(f"%{query}%")
-    ).limit(50).all()
-    
-    # Prepare for caching
-    jobs_data = []
-    for job in jobs:
-        job_data = job.__dict__.copy()
-        job_data.pop('_sa_instance_state', None)
-        jobs_data.append(job_data)
+# Full-text job search with caching
+SEARCH_HEADLINE_OPTIONS = "MaxWords=35, MinWords=15, MaxFragments=2, StartSel=<mark>, StopSel=</mark>"
+
+def html_escaped(column):
+    """SQL expression escaping &, <, > and " in a text column"""
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;")):
+        column = func.replace(column, char, entity)
+    return column
+
+@router.get("/jobs/search/{query}", response_model=List[JobSearchResult])
+def search_jobs(
+    query: str,
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=50),
+    db: Session = Depends(get_read_db),
+    cache: RedisCache = Depends(get_cache)
+):
+    """Ranked full-text search over title, company, location and description"""
+    record_search(query)
+    pin_recent_writes(db, cache, JOBS_CACHE_NAMESPACE)
+    return json_response(
+        cached_job_search(cache, db, query, skip, limit),
+        accept_encoding=request.headers.get("accept-encoding")
+    )
+
+def job_search_query(db: Session, query: str, skip: int = 0, limit: int = 50):
+    """One page of (job, rank, snippet) rows matching a web-search style query"""
+    # Search database via the GIN-indexed search_vector column
+    ts_query = func.websearch_to_tsquery(JOB_SEARCH_CONFIG, query)
+    rank = func.ts_rank_cd(Job.search_vector, ts_query).label("rank")
+    # The snippet is an HTML fragment, so the employer-supplied
+    # description is escaped before the <mark> tags go in
+    snippet = func.ts_headline(
+        JOB_SEARCH_CONFIG, html_escaped(Job.description), ts_query, SEARCH_HEADLINE_OPTIONS
+    ).label("snippet")
+    return db.query(Job, rank, snippet).filter(
+        Job.search_vector.op("@@")(ts_query)
+    ).order_by(rank.desc(), Job.id.desc()).offset(skip).limit(limit)
+
+def cached_job_search(cache: RedisCache, db: Session, query: str, skip: int = 0, limit: int = 50):
+    """Cached payload for one page of search results"""
+    cache_key = cache.namespaced_key(JOBS_CACHE_NAMESPACE, f"search:{query.lower()}:{skip}:{limit}")
     
-    # Cache search results for 15 minutes
-    cache.set(cache_key, jobs_data, expire=900)
+    def build(db: Session):
+        return serialize_search_results(job_search_query(db, query, skip, limit).all())
     
-    return jobs
+    # Cache search results for 15 minutes
+    return cached_payload(cache, cache_key, build, db, expire=900)
 
 # Background task integration
 @router.post("/jobs/{job_id}/send-notification")
@@ -146,21 +463,7 @@ def send_job_notification(
     from background_tasks import send_email_notification
     
     # Create email content
-    subject = f"New Job Opportunity: {job.title}"
-    message = f"""
-    Dear Candidate,
-    
-    We have a new job opportunity that might interest you:
-    
-    Title: {job.title}
-    Location: {job.location}
-    Company: {job.company}
-    
-    Description: {job.description}
-    
-    Best regards,
-    Skyways Global Recruitment Team
-    """
+    subject, message = job_alert_content(job)
     
     # Send task to background queue
     task = send_email_notification.delay(recipient_email, subject, message)
@@ -171,73 +474,143 @@ def send_job_notification(
         "job_id": job_id
     }
 
-@router.get("/jobs/analytics/popular")
-def get_popular_jobs(cache: RedisCache = Depends(get_cache), db: Session = Depends(get_db)):
-    """Get popular jobs based on view counts stored in Redis"""
-    cache_key = "analytics:popular_jobs"
+@router.post("/jobs/{job_id}/campaigns", response_model=JobAlertCampaign, status_code=202)
+def start_job_alert_campaign(
+    job_id: int,
+    campaign: JobAlertCampaignCreate,
+    db: Session = Depends(get_db)
+):
+    """Send a job alert to a recipient list or segment, chunked over reused SMTP sessions"""
+    if (campaign.recipients is None) == (campaign.segment is None):
+        raise HTTPException(status_code=400, detail="Pass either recipients or segment")
+    if campaign.segment is not None and campaign.segment not in SEGMENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown segment; expected one of: {', '.join(SEGMENTS)}"
+        )
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    # Import background task
+    from background_tasks import send_job_alert_chunk
     
-    # Try cache first
-    cached_data = cache.get(cache_key)
-    if cached_data:
-        return cached_data
+    if campaign.segment is not None:
+        recipients = iter_segment(db, campaign.segment)
+    else:
+        # Drop duplicates, keeping the caller's order
+        recipients = list(dict.fromkeys(email.lower() for email in campaign.recipients))
     
-    # Get job view counts from Redis
-    from redis_config import get_redis
     redis_client = get_redis()
-    
-    job_views = {}
-    view_keys = redis_client.keys("job_views:*")
-    
-    for key in view_keys:
-        job_id = key.split(":")[-1]
-        views = redis_client.get(key) or 0
-        job_views[int(job_id)] = int(views)
-    
-    # Sort by views and get top 10
-    popular_job_ids = sorted(job_views.items(), key=lambda x: x[1], reverse=True)[:10]
-    
-    # Get job details
-    popular_jobs = []
-    for job_id, views in popular_job_ids:
-        job = db.query(Job).filter(Job.id == job_id).first()
-        if job:
-            job_data = {
-                "id": job.id,
-                "title": job.title,
-                "company": job.company,
-                "location": job.location,
+    campaign_id = start_campaign(redis_client, job, recipients, send_job_alert_chunk)
+    return campaign_stats(redis_client, campaign_id)
+
+@router.get("/jobs/campaigns/{campaign_id}", response_model=JobAlertCampaign)
+def get_job_alert_campaign(campaign_id: str):
+    """Progress, throughput and recent failures of a job-alert campaign"""
+    stats = campaign_stats(get_redis(), campaign_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return stats
+
+@router.get("/jobs/analytics/popular")
+def get_popular_jobs(
+    request: Request,
+    window: str = Query(ALL_TIME, pattern="^(all|24h|7d|30d)$"),
+    limit: int = Query(10, ge=1, le=50),
+    cache: RedisCache = Depends(get_cache),
+    db: Session = Depends(get_read_db)
+):
+    """Get popular jobs based on view counts stored in Redis"""
+    cache_key = f"analytics:popular_jobs:{window}:{limit}"
+    
+    def build(db: Session):
+        # Top-N straight from the sorted set (or the union of its time buckets)
+        popular_job_ids = top_jobs(get_redis(), window, limit)
+        
+        # Get job details in one query, keeping leaderboard order
+        jobs_by_id = {
+            job.id: job
+            for job in db.query(Job.id, Job.title, Job.company, Job.location).filter(
+                Job.id.in_([job_id for job_id, _ in popular_job_ids])
+            ).all()
+        } if popular_job_ids else {}
+        popular_jobs = [
+            {
+                "id": job_id,
+                "title": jobs_by_id[job_id].title,
+                "company": jobs_by_id[job_id].company,
+                "location": jobs_by_id[job_id].location,
                 "views": views
             }
-            popular_jobs.append(job_data)
-    
-    # Cache for 1 hour
-    cache.set(cache_key, popular_jobs, expire=3600)
+            for job_id, views in popular_job_ids
+            if job_id in jobs_by_id
+        ]
+        return json.dumps({"window": window, "popular_jobs": popular_jobs})
     
-    return {"popular_jobs": popular_jobs}
+    # Cache for 5 minutes
+    return json_response(
+        cached_payload(cache, cache_key, build, db, expire=300),
+        accept_encoding=request.headers.get("accept-encoding")
+    )
+
+def visitor_id_for(request: Request) -> str:
+    """Identify a visitor for unique-view counting"""
+    visitor_id = request.headers.get("X-Visitor-Id")
+    if visitor_id:
+        return visitor_id[:128]
+    # Anonymous fallback: client address plus user agent
+    client_host = request.client.host if request.client else ""
+    fingerprint = f"{client_host}|{request.headers.get('user-agent', '')}"
+    return hashlib.sha1(fingerprint.encode()).hexdigest()
 
 @router.post("/jobs/{job_id}/view")
-def track_job_view(job_id: int, db: Session = Depends(get_db)):
-    """Track job views for analytics"""
-    job = db.query(Job).filter(Job.id == job_id).first()
-    if not job:
+def track_job_view(job_id: int, request: Request, db: Session = Depends(get_read_db)):
+    """Track job views for analytics (buffered, flushed to Redis in batches)"""
+    def load_job_ids():
+        # Rebuilds the shared id set, so it must include jobs just created
+        pin_to_primary(db)
+        return [row.id for row in db.query(Job.id).all()]
+    if not known_job_ids.contains(get_redis(), load_job_ids, job_id):
         raise HTTPException(status_code=404, detail="Job not found")
     
-    # Increment view count in Redis
-    from redis_config import get_redis
-    redis_client = get_redis()
-    
-    view_key = f"job_views:{job_id}"
-    redis_client.incr(view_key)
-    redis_client.expire(view_key, 86400 * 30)  # Keep for 30 days
-    
-    current_views = redis_client.get(view_key) or 0
+    view_buffer.add(job_id, visitor_id_for(request))
     
     return {
         "job_id": job_id,
-        "views": int(current_views),
+        # Views in Redis plus this worker's unflushed ones; other workers'
+        # buffered views show up within VIEW_FLUSH_INTERVAL
+        "views": flushed_views(get_redis(), job_id) + view_buffer.pending(job_id),
         "message": "View tracked successfully"
     }
 
+@router.get("/jobs/{job_id}/views")
+def get_job_views(job_id: int):
+    """Total views and approximate unique visitors for a job"""
+    views, unique_visitors = view_totals(get_redis(), job_id)
+    return {"job_id": job_id, "views": views, "unique_visitors": unique_visitors}
+
+@router.get("/jobs/{job_id}/views/daily", response_model=List[JobViewDay])
+async def get_job_view_history(
+    job_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Per-day views for a job from the durable rollup table (default: last 30 days)"""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    
+    # Range scan on the (job_id, view_date) primary key
+    return (await db.scalars(
+        select(JobViewDaily).where(
+            JobViewDaily.job_id == job_id,
+            JobViewDaily.view_date.between(start, end)
+        ).order_by(JobViewDaily.view_date)
+    )).all()
+
 @router.patch("/jobs/{job_id}/document-requirements")
 def update_job_document_requirements(
     job_id: int, 
@@ -267,7 +640,7 @@ def update_job_document_requirements(
     db.refresh(db_job)
     
     # Clear caches
-    cache.delete(f"job:{job_id}")
-    cache.delete("jobs:all")
+    invalidate_job_caches(cache, job_id)
+    cache_warmer.request()
     
     return {"job_id": job_id, "required_documents": required_documents}
\ No newline at end of file
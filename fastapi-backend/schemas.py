@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
-from datetime import datetime
+from typing import Dict, List, Optional
+from datetime import date, datetime
 from models import JobType, JobStatus, ApplicationStatus, UserRole, DocumentType, InquiryStatus, Priority
 
 class UserBase(BaseModel):
@@ -40,6 +40,81 @@ class Job(JobBase):
     class Config:
         from_attributes = True
 
+class JobListWithFacets(BaseModel):
+    jobs: List[Job]
+    facets: Dict[str, Dict[str, int]]  # facet -> value -> number of jobs
+
+class JobCard(BaseModel):
+    """Compact job for list cards: no description, requirements or documents"""
+    id: int
+    title: str
+    company: str
+    location: str
+    type: JobType
+    salary: str
+    posted_date: datetime
+
+    class Config:
+        from_attributes = True
+
+class JobCardListWithFacets(BaseModel):
+    jobs: List[JobCard]
+    facets: Dict[str, Dict[str, int]]
+
+class JobSearchResult(Job):
+    rank: float
+    snippet: str  # HTML-escaped description excerpt with matches wrapped in <mark></mark>
+
+class JobSuggestion(BaseModel):
+    text: str
+    field: str  # "title", "company" or "location"
+    score: float
+
+class JobSuggestions(BaseModel):
+    prefix: str
+    suggestions: List[JobSuggestion]
+
+class JobImportRowError(BaseModel):
+    row: int  # 1-based data row (CSV header not counted)
+    errors: List[str]
+
+class JobImportResult(BaseModel):
+    total_rows: int
+    imported: int
+    failed: int
+    errors: List[JobImportRowError]
+    errors_truncated: bool  # True when more rows failed than are listed
+
+class JobAlertCampaignCreate(BaseModel):
+    # Exactly one of these: explicit addresses, or a segment from job_alerts.SEGMENTS
+    recipients: Optional[List[EmailStr]] = None
+    segment: Optional[str] = None
+
+class JobAlertCampaign(BaseModel):
+    campaign_id: str
+    job_id: int
+    status: str  # "queued", "sending" or "finished"
+    total: int
+    sent: int
+    failed: int
+    chunks: int
+    chunks_done: int
+    smtp_connections: int
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    emails_per_second: Optional[float] = None
+    send_seconds: float
+    recent_failures: List[str]
+
+class JobViewDay(BaseModel):
+    view_date: date
+    views: int
+    unique_visitors: int
+
+    class Config:
+        from_attributes = True
+
 # Document schemas
 class ApplicationDocumentCreate(BaseModel):
     document_type: DocumentType
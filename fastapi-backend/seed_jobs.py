@@ -1,3 +1,4 @@
+from sqlalchemy import insert, tuple_
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from models import Job, JobType, JobStatus
@@ -136,28 +137,22 @@ sample_jobs = [
 def seed_jobs():
     db = SessionLocal()
     try:
-        # Get the highest existing job ID
-        highest_id = db.query(Job).order_by(Job.id.desc()).first()
-        start_id = highest_id.id if highest_id else 0
+        # Skip jobs whose title and company already exist (one lookup for all)
+        existing = {
+            (row.title, row.company)
+            for row in db.query(Job.title, Job.company).filter(
+                tuple_(Job.title, Job.company).in_([(job["title"], job["company"]) for job in sample_jobs])
+            ).all()
+        }
+        new_jobs = [job for job in sample_jobs if (job["title"], job["company"]) not in existing]
         
-        # Add new jobs
+        # Add new jobs with a single multi-row INSERT
         print("Adding new jobs...")
-        for job_data in sample_jobs:
-            # Skip if job with same title and company already exists
-            existing_job = db.query(Job).filter(
-                Job.title == job_data["title"],
-                Job.company == job_data["company"]
-            ).first()
-            
-            if not existing_job:
-                job = Job(**job_data)
-                db.add(job)
-        
+        if new_jobs:
+            db.execute(insert(Job), new_jobs)
         db.commit()
 
-        # Verify the count of new jobs
-        new_count = db.query(Job).count() - start_id
-        print(f"Successfully added {new_count} new jobs")
+        print(f"Successfully added {len(new_jobs)} new jobs")
 
     except Exception as e:
         print(f"Error seeding jobs: {e}")
@@ -0,0 +1,92 @@
+"""Local SMTP stand-in for testing job-alert campaigns.
+
+Accepts mail on a plain (no TLS, no auth) SMTP port, discards it and prints
+how many messages each connection carried, so you can check that a campaign
+reuses one session per chunk. Recipients containing "reject" are refused
+with 550, which exercises the campaign failure stats.
+
+Usage: python smtp_sink.py [port] [max_messages_per_connection]
+
+Then run the API and a Celery worker with
+SMTP_SERVER=localhost SMTP_PORT=<port> SMTP_STARTTLS=false SENDER_EMAIL=alerts@example.com
+"""
+import asyncio
+import sys
+import time
+
+class Stats:
+    def __init__(self):
+        self.connections = 0
+        self.messages = 0
+        self.rejected = 0
+        self.started = None
+
+stats = Stats()
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, max_messages: int):
+    stats.connections += 1
+    if stats.started is None:
+        stats.started = time.monotonic()
+    connection = stats.connections
+    messages = 0
+
+    async def reply(line: str):
+        writer.write(f"{line}\r\n".encode())
+        await writer.drain()
+
+    await reply("220 smtp-sink ready")
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                await reply("250 smtp-sink")
+            elif verb == "MAIL":
+                if max_messages and messages >= max_messages:
+                    # Like providers that cap messages per connection
+                    await reply("421 Too many messages, closing connection")
+                    break
+                await reply("250 OK")
+            elif verb == "RCPT":
+                if "reject" in command.lower():
+                    stats.rejected += 1
+                    await reply("550 Mailbox unavailable")
+                else:
+                    await reply("250 OK")
+            elif verb == "DATA":
+                await reply("354 End data with <CR><LF>.<CR><LF>")
+                while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                    pass
+                messages += 1
+                stats.messages += 1
+                await reply("250 OK: queued")
+            elif verb in ("RSET", "NOOP"):
+                await reply("250 OK")
+            elif verb == "QUIT":
+                await reply("221 Bye")
+                break
+            else:
+                await reply("502 Command not implemented")
+    finally:
+        writer.close()
+        elapsed = time.monotonic() - stats.started
+        rate = stats.messages / elapsed if elapsed else 0
+        print(f"connection {connection}: {messages} messages "
+              f"(total {stats.messages} messages over {stats.connections} connections, "
+              f"{stats.rejected} rejected, {rate:.1f}/s)")
+
+async def main(port: int, max_messages: int):
+    server = await asyncio.start_server(
+        lambda reader, writer: handle(reader, writer, max_messages), "127.0.0.1", port
+    )
+    print(f"SMTP sink listening on 127.0.0.1:{port}")
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 1025
+    max_messages = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    asyncio.run(main(port, max_messages))
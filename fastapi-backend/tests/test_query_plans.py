@@ -0,0 +1,296 @@
+"""EXPLAIN regression tests for the routers' hot queries.
+
+Each case runs the query helper an endpoint uses (routers/*, pagination.py)
+on a seeded database, records every statement it sends (including
+selectinload follow-ups) and EXPLAINs them. A case fails when a plan has a
+sequential scan, or when an index it names is not used with an Index Cond
+on the given columns. The second check matters because sequential scans
+are disabled while planning (SET LOCAL enable_seqscan = off): a filtered
+list would still get an index scan from the plain sort index plus a Filter
+node if its composite index were missing. Queries that read the whole table
+on purpose (the inquiry stats summary) are marked seq_scan_ok.
+
+The tests need a local PostgreSQL, given by TEST_DATABASE_URL (or
+DATABASE_URL), and are skipped when there is none. They never touch
+existing tables: the `seeded` fixture creates the schema from models.py in
+a scratch schema, fills it with generate_series rows (QUERY_PLAN_SEED_JOBS
+jobs, default 2000, and proportionate related rows), ANALYZEs it and drops
+it afterwards.
+
+When an endpoint gets a new filter or query, add a case for it here, and
+the index it needs (models.py and a migration).
+
+Usage: pytest tests/test_query_plans.py
+"""
+import json
+import os
+import re
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Tuple
+import pytest
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL") or os.getenv("DATABASE_URL")
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", "db", "postgres"}
+SEED_JOBS = int(os.getenv("QUERY_PLAN_SEED_JOBS", "2000"))
+PAGE = 20
+
+if not TEST_DATABASE_URL or make_url(TEST_DATABASE_URL).host not in LOCAL_HOSTS:
+    pytest.skip("needs a local PostgreSQL in TEST_DATABASE_URL", allow_module_level=True)
+
+# database.py builds its engines from DATABASE_URL when models is imported
+os.environ.setdefault("DATABASE_URL", TEST_DATABASE_URL)
+import models
+from pagination import keyset_paginate, page_query
+from routers.agency_analytics import get_agency_dashboard
+from routers.applications import application_export_query, application_list_statement, APPLICATION_LIST_SORT_COLUMNS
+from routers.contact_inquiries import contact_inquiry_list_statement, CONTACT_INQUIRY_LIST_SORT_COLUMNS
+from routers.employer_inquiries import inquiry_list_statement, inquiry_stats_statement, INQUIRY_LIST_SORT_COLUMNS
+from routers.jobs import job_list_query, job_search_query, JOB_LIST_SORT_COLUMNS
+
+class Case(NamedTuple):
+    name: str
+    run: Callable[[Session], Any]
+    # index name -> columns its Index Cond must mention (none: any use of the index)
+    indexes: Dict[str, Tuple[str, ...]]
+    seq_scan_ok: bool = False
+
+def jobs_page(**filters) -> Callable[[Session], Any]:
+    return lambda db: keyset_paginate(job_list_query(db, **filters), JOB_LIST_SORT_COLUMNS, PAGE)
+
+def jobs_second_page(db: Session):
+    _, cursor = keyset_paginate(job_list_query(db), JOB_LIST_SORT_COLUMNS, PAGE)
+    return keyset_paginate(job_list_query(db), JOB_LIST_SORT_COLUMNS, PAGE, cursor=cursor)
+
+def statement_page(statement, sort_columns) -> Callable[[Session], Any]:
+    # What keyset_paginate_async runs for the async list endpoints
+    return lambda db: db.scalars(page_query(statement, sort_columns, PAGE)).all()
+
+def cases() -> List[Case]:
+    documents_index = {"ix_application_documents_application_id": ("application_id",)}
+    return [
+        # routers/jobs.py: GET /jobs/ (keyset pages, newest first) and search
+        Case("jobs list", jobs_page(), {"ix_jobs_posted_date_id": ()}),
+        Case("jobs list, next page", jobs_second_page, {"ix_jobs_posted_date_id": ("posted_date", "id")}),
+        Case(
+            "jobs list by status and type",
+            jobs_page(status=models.JobStatus.ACTIVE, job_type=models.JobType.FULL_TIME),
+            {"ix_jobs_status_type_posted_date_id": ("status", "type")},
+        ),
+        Case(
+            "jobs list by location",
+            jobs_page(location="Nairobi"),
+            {"ix_jobs_location_posted_date_id": ("location",)},
+        ),
+        Case(
+            "jobs list by passport_required",
+            jobs_page(passport_required=True),
+            {"ix_jobs_passport_required_posted_date_id": ("passport_required",)},
+        ),
+        Case(
+            "jobs search",
+            lambda db: job_search_query(db, "driver", limit=PAGE).all(),
+            {"ix_jobs_search_vector": ("search_vector",)},
+        ),
+        # routers/applications.py: GET /applications/ and /applications/export
+        Case(
+            "applications list",
+            statement_page(application_list_statement(), APPLICATION_LIST_SORT_COLUMNS),
+            {"ix_job_applications_applied_date_id": (), **documents_index},
+        ),
+        Case(
+            "applications export by job",
+            lambda db: application_export_query(db, job_id=1).all(),
+            {"ix_job_applications_job_id_applied_date_id": ("job_id",), **documents_index},
+        ),
+        # routers/employer_inquiries.py: GET /employer-inquiries/ and /stats/summary
+        Case(
+            "employer inquiries list",
+            statement_page(inquiry_list_statement(), INQUIRY_LIST_SORT_COLUMNS),
+            {"ix_employer_inquiries_priority_created_at_id": ()},
+        ),
+        Case(
+            "employer inquiries list by status",
+            statement_page(inquiry_list_statement(status=models.InquiryStatus.NEW), INQUIRY_LIST_SORT_COLUMNS),
+            {"ix_employer_inquiries_status_priority_created_at_id": ("status",)},
+        ),
+        Case(
+            "employer inquiries stats",
+            lambda db: db.execute(inquiry_stats_statement()).one(),
+            {},
+            seq_scan_ok=True,
+        ),
+        # routers/contact_inquiries.py: GET /contact-inquiries/
+        Case(
+            "contact inquiries list",
+            statement_page(contact_inquiry_list_statement(), CONTACT_INQUIRY_LIST_SORT_COLUMNS),
+            {"ix_contact_inquiries_created_at_id": ()},
+        ),
+        Case(
+            "contact inquiries list by is_read",
+            statement_page(contact_inquiry_list_statement(is_read=False), CONTACT_INQUIRY_LIST_SORT_COLUMNS),
+            {"ix_contact_inquiries_is_read_created_at_id": ("is_read",)},
+        ),
+        # routers/agency_analytics.py: GET /agency-analytics/{agency_id}/dashboard
+        Case(
+            "agency dashboard",
+            lambda db: get_agency_dashboard(1, db),
+            {
+                "ix_users_agency_id": ("agency_id",),
+                "ix_job_applications_job_id_applied_date_id": ("job_id",),
+                "ix_employer_inquiries_agency_id_created_at": ("agency_id", "created_at"),
+                "ix_employer_inquiries_agency_id_urgent": ("agency_id",),
+            },
+        ),
+    ]
+
+def seed_statements(jobs: int) -> Iterator[str]:
+    """INSERT ... SELECT generate_series statements for a dataset of `jobs` jobs"""
+    def enum(column) -> str:
+        # Enum columns store member names; cycle through them by row number
+        names = ", ".join(f"'{name}'" for name in column.type.enums)
+        return f"(ARRAY[{names}])[1 + i % {len(column.type.enums)}]::{column.type.name}"
+
+    agencies = max(1, jobs // 100)
+    users = max(1, jobs // 10)
+    applications = jobs * 5
+    inquiries = jobs
+    yield f"""
+        INSERT INTO agencies (agency_name, email, phone, license_number, license_expiry)
+        SELECT 'Agency ' || i, 'seed-agency-' || i || '@example.com', '0700000000', 'LIC-' || i, current_date + 365
+        FROM generate_series(1, {agencies}) AS i
+    """
+    yield f"""
+        INSERT INTO users (name, email, role, hashed_password, agency_id)
+        SELECT 'User ' || i, 'seed-user-' || i || '@example.com', {enum(models.User.__table__.c.role)}, 'x',
+               (SELECT min(id) FROM agencies) + i % {agencies}
+        FROM generate_series(1, {users}) AS i
+    """
+    yield f"""
+        INSERT INTO jobs (title, company, location, type, description, requirements, salary,
+                          posted_date, status, employer_id, passport_required)
+        SELECT 'Job ' || i, 'Company ' || i % 500, (ARRAY['Nairobi', 'Mombasa', 'Dubai', 'Doha'])[1 + i % 4],
+               {enum(models.Job.__table__.c.type)}, 'Seeded job ' || i, ARRAY['requirement'], '1000',
+               now() - (i % 365) * interval '1 day', {enum(models.Job.__table__.c.status)},
+               (SELECT min(id) FROM users) + i % {users}, i % 3 = 0
+        FROM generate_series(1, {jobs}) AS i
+    """
+    yield f"""
+        INSERT INTO job_applications (job_id, applicant_name, email, phone, status, applied_date)
+        SELECT (SELECT min(id) FROM jobs) + i % {jobs}, 'Applicant ' || i, 'applicant-' || i || '@example.com',
+               '0700000000', {enum(models.JobApplication.__table__.c.status)}, now() - (i % 365) * interval '1 day'
+        FROM generate_series(1, {applications}) AS i
+    """
+    yield f"""
+        INSERT INTO application_documents (application_id, document_type, document_url, document_name, uploaded_at)
+        SELECT (SELECT min(id) FROM job_applications) + i % {applications},
+               {enum(models.ApplicationDocument.__table__.c.document_type)}, '/uploads/' || i, 'document.pdf', now()
+        FROM generate_series(1, {applications}) AS i
+    """
+    yield f"""
+        INSERT INTO employer_inquiries (agency_id, employer_name, message, contact_email, is_urgent, status,
+                                        priority, created_at, updated_at)
+        SELECT (SELECT min(id) FROM agencies) + i % {agencies}, 'Employer ' || i, 'Seeded inquiry',
+               'employer-' || i || '@example.com', i % 20 = 0, {enum(models.EmployerInquiry.__table__.c.status)},
+               {enum(models.EmployerInquiry.__table__.c.priority)}, now() - (i % 365) * interval '1 day', now()
+        FROM generate_series(1, {inquiries}) AS i
+    """
+    yield f"""
+        INSERT INTO contact_inquiries (name, email, subject, message, created_at, is_read)
+        SELECT 'Contact ' || i, 'contact-' || i || '@example.com', 'Seeded', 'Seeded contact inquiry',
+               now() - (i % 365) * interval '1 day', i % 4 = 0
+        FROM generate_series(1, {inquiries}) AS i
+    """
+
+@pytest.fixture(scope="module")
+def seeded() -> Iterator[Connection]:
+    """Connection whose search_path is a scratch schema with the models' tables, seeded and ANALYZEd"""
+    engine = create_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    try:
+        connection = engine.connect()
+    except exc.OperationalError as e:
+        engine.dispose()
+        pytest.skip(f"no PostgreSQL reachable at {make_url(TEST_DATABASE_URL).host}: {e.orig}")
+    schema = f"query_plans_{uuid.uuid4().hex[:8]}"
+    try:
+        connection.execute(text(f"CREATE SCHEMA {schema}"))
+        # Enum types and tables are created in (and found through) the scratch schema
+        connection.execute(text(f"SET search_path TO {schema}"))
+        models.Base.metadata.create_all(connection, checkfirst=False)
+        for statement in seed_statements(SEED_JOBS):
+            connection.execute(text(statement))
+        # Fresh statistics, as autovacuum would have gathered on a real database
+        for table in models.Base.metadata.sorted_tables:
+            connection.execute(text(f"ANALYZE {table.name}"))
+        connection.commit()
+        yield connection
+    finally:
+        connection.rollback()
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        connection.commit()
+        connection.close()
+        engine.dispose()
+
+def plan_nodes(plan: Dict) -> Iterator[Dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+@contextmanager
+def recorded_statements(connection: Connection) -> Iterator[List[Tuple[str, Any]]]:
+    """Statements and parameters sent on `connection` inside the block"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+
+def run(connection: Connection, case: Case) -> List[Tuple[str, Any]]:
+    session = Session(bind=connection)
+    try:
+        with recorded_statements(connection) as statements:
+            case.run(session)
+    finally:
+        session.close()
+        connection.rollback()
+    return statements
+
+def explain(connection: Connection, statement: str, parameters: Any) -> Dict:
+    connection.execute(text("SET LOCAL enable_seqscan = off"))
+    try:
+        result = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    finally:
+        # Ends the transaction, and with it the SET LOCAL
+        connection.rollback()
+    # psycopg2 decodes the json column; other drivers may hand back the text
+    plan = json.loads(result) if isinstance(result, str) else result
+    return plan[0]["Plan"]
+
+def describe(node: Dict) -> str:
+    return f"{node['Node Type']}" + (f" on {node['Relation Name']}" if "Relation Name" in node else "") + (
+        f" using {node['Index Name']}" if "Index Name" in node else ""
+    )
+
+@pytest.mark.parametrize("case", cases(), ids=lambda case: case.name)
+def test_query_uses_its_index(seeded: Connection, case: Case):
+    statements = run(seeded, case)
+    nodes = [node for statement in statements for node in plan_nodes(explain(seeded, *statement))]
+    scans = [describe(node) for node in nodes if node["Node Type"] == "Seq Scan"]
+    assert case.seq_scan_ok or not scans, f"{case.name} has no usable index: {', '.join(scans)}"
+
+    used = ", ".join(describe(node) for node in nodes if "Relation Name" in node or "Index Name" in node)
+    for index, columns in case.indexes.items():
+        conditions = [node.get("Index Cond", "") for node in nodes if node.get("Index Name") == index]
+        assert conditions, f"{case.name} doesn't use {index} (plan: {used})"
+        assert any(
+            all(re.search(rf"\b{column}\b", condition) for column in columns) for condition in conditions
+        ), f"{case.name} uses {index} without an Index Cond on {', '.join(columns)}: {conditions}"
@@ -0,0 +1,81 @@
+"""Replica health check queries, run as a least-privilege role.
+
+pg_stat_wal_receiver hides most of its columns from roles without
+pg_read_all_stats, and the app usually connects as such a role. These tests
+create a throwaway NOLOGIN role on TEST_DATABASE_URL (or DATABASE_URL) and
+run REPLICATION_LAG_QUERY under SET ROLE. The replica test also needs
+TEST_REPLICA_URL, a streaming standby of that database; the role reaches it
+through replication. Everything is skipped without a local PostgreSQL, and
+when the connecting user can't create roles.
+
+Usage: pytest tests/test_read_replicas.py
+"""
+import os
+import time
+import uuid
+from typing import Iterator
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+from read_replicas import REPLICATION_LAG_QUERY
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL") or os.getenv("DATABASE_URL")
+TEST_REPLICA_URL = os.getenv("TEST_REPLICA_URL")
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", "db", "postgres"}
+
+if not TEST_DATABASE_URL or make_url(TEST_DATABASE_URL).host not in LOCAL_HOSTS:
+    pytest.skip("needs a local PostgreSQL in TEST_DATABASE_URL", allow_module_level=True)
+
+@pytest.fixture(scope="module")
+def restricted_role() -> Iterator[str]:
+    """Name of a NOLOGIN role with no grants beyond PUBLIC's, dropped afterwards"""
+    engine = create_engine(TEST_DATABASE_URL, poolclass=NullPool, isolation_level="AUTOCOMMIT")
+    try:
+        connection = engine.connect()
+    except exc.OperationalError as e:
+        engine.dispose()
+        pytest.skip(f"no PostgreSQL reachable at {make_url(TEST_DATABASE_URL).host}: {e.orig}")
+    role = f"replica_check_{uuid.uuid4().hex[:8]}"
+    try:
+        try:
+            connection.execute(text(f"CREATE ROLE {role} NOLOGIN NOSUPERUSER"))
+        except exc.ProgrammingError as e:
+            pytest.skip(f"can't create a test role: {e.orig}")
+        yield role
+    finally:
+        connection.execute(text(f"DROP ROLE IF EXISTS {role}"))
+        connection.close()
+        engine.dispose()
+
+def lag_as(url: str, role: str, wait: float = 0):
+    """REPLICATION_LAG_QUERY's result on `url` under SET ROLE `role`
+
+    Waits up to `wait` seconds for the role to exist there (a standby gets
+    it through replication).
+    """
+    engine = create_engine(url, poolclass=NullPool)
+    try:
+        with engine.connect() as connection:
+            deadline = time.monotonic() + wait
+            exists = text("SELECT 1 FROM pg_roles WHERE rolname = :role")
+            while not connection.execute(exists, {"role": role}).scalar() and time.monotonic() < deadline:
+                connection.rollback()
+                time.sleep(0.1)
+            connection.execute(text(f"SET LOCAL ROLE {role}"))
+            assert not connection.execute(text("SELECT rolsuper FROM pg_roles WHERE rolname = current_user")).scalar()
+            return connection.execute(REPLICATION_LAG_QUERY).scalar()
+    except exc.OperationalError as e:
+        pytest.skip(f"no PostgreSQL reachable at {make_url(url).host}: {e.orig}")
+    finally:
+        engine.dispose()
+
+def test_primary_reports_no_lag(restricted_role: str):
+    assert lag_as(TEST_DATABASE_URL, restricted_role) == 0
+
+@pytest.mark.skipif(not TEST_REPLICA_URL, reason="needs a streaming standby in TEST_REPLICA_URL")
+def test_streaming_replica_has_a_lag(restricted_role: str):
+    # NULL would mean the WAL receiver looked down, and the replica unhealthy
+    lag = lag_as(TEST_REPLICA_URL, restricted_role, wait=10)
+    assert lag is not None
+    assert float(lag) >= 0